@@ -5,5 +5,5 @@ Library Manager (package marker).
 Ekspos modul publik dan versi paket.
 Dipakai oleh pyproject entry-point (`library-cli`) untuk menjalankan CLI.
 """
-__all__ = ["cli", "services", "utils"]
+__all__ = ["cli", "services", "utils", "pager", "analytics", "analytics_np", "snapshot", "query", "charts", "scan", "shards", "jobs", "changes"]
 __version__ = "0.1.0"
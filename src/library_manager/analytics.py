@@ -0,0 +1,183 @@
+# src/library_manager/analytics.py
+"""
+Engine agregasi map-reduce untuk katalog besar.
+
+Alur:
+- map   : katalog dipecah jadi chunk → tiap chunk diagregasi (`aggregate_chunk`) menjadi partial.
+- reduce: partial digabung berurutan (`merge_partials`) → hasil identik dengan agregasi 1 core.
+
+Sumber data:
+- `aggregate_books(books)`: list[dict] di memori (mis. hasil `load_books()`) → satu pass
+  di proses ini, TANPA process pool.
+- `aggregate_jsonl(path)`: file JSON Lines / segmen; tiap worker membaca rentang byte-nya
+  sendiri sehingga katalog tidak perlu di-parse & di-pickle oleh proses utama.
+  (Katalog ter-shard memakai pola yang sama per file shard, lihat shards.py.)
+
+Kenapa list di memori tidak diparalelkan: yang mahal adalah parse JSON, bukan menghitung.
+Ukuran di 400k buku (1 core): hitung serial ≈1,0 dtk; pickle 8 chunk × 50k ≈0,65 dtk +
+unpickle ≈0,75 dtk; pool 2 worker total ≈4,2 dtk; parse JSONL ≈2,5 dtk. Biaya IPC saja
+sudah melebihi hitungannya, berapa pun jumlah core → paralel hanya jika worker mem-parse
+sumbernya sendiri (rentang byte JSONL / file shard).
+
+Bentuk partial (dict biasa agar bisa di-pickle antar proses):
+    {"total": int, "status": {status: n}, "borrowed": [book, ...],
+     "penulis": {nama: [total_dipinjam, jumlah_judul]}, "penerbit": {...},
+     "judul": [[judul, dipinjam, id], ...]}
+`id` ikut disimpan agar hasil fan-out (mis. per shard) bisa dikembalikan ke urutan katalog
+→ urutan seri Top-N & daftar dipinjam sama dengan katalog satu file.
+"""
+
+from __future__ import annotations
+import heapq
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Sequence
+
+GROUP_FIELDS = ("penulis", "penerbit")
+ALL_FIELDS = ("penulis", "penerbit", "judul")
+UNKNOWN = "(Tidak diketahui)"
+
+JSONL_MIN_BYTES = 32 * 1024 * 1024
+
+# ---------- Map ----------
+def new_partial(fields: Sequence[str] = ALL_FIELDS) -> dict:
+    p: dict = {"total": 0, "status": {}, "borrowed": []}
+    for f in fields:
+        p[f] = [] if f == "judul" else {}
+    return p
+
+def _add_book(p: dict, b: dict, fields: Sequence[str]) -> None:
+    p["total"] += 1
+    st = b.get("status")
+    p["status"][st] = p["status"].get(st, 0) + 1
+    if st == "borrowed":
+        p["borrowed"].append(b)
+    n = int(b.get("dipinjam", 0))
+    for f in fields:
+        if f == "judul":
+            p["judul"].append([b.get("judul"), n, b.get("id")])
+            continue
+        k = (b.get(f) or "").strip() or UNKNOWN
+        acc = p[f].get(k)
+        if acc is None:
+            p[f][k] = [n, 1]
+        else:
+            acc[0] += n; acc[1] += 1
+
+def aggregate_chunk(books: Iterable[dict], fields: Sequence[str] = ALL_FIELDS) -> dict:
+    """Agregasi satu chunk → partial."""
+    p = new_partial(fields)
+    for b in books:
+        _add_book(p, b, fields)
+    return p
+
+# ---------- Reduce ----------
+def merge_partials(parts: Iterable[dict], fields: Sequence[str] = ALL_FIELDS) -> dict:
+    """Gabungkan partial SESUAI URUTAN chunk (urutan baris judul/borrowed tetap sama)."""
+    out = new_partial(fields)
+    for p in parts:
+        out["total"] += p["total"]
+        for st, n in p["status"].items():
+            out["status"][st] = out["status"].get(st, 0) + n
+        out["borrowed"].extend(p["borrowed"])
+        for f in fields:
+            if f == "judul":
+                out["judul"].extend(p["judul"])
+                continue
+            dst = out[f]
+            for k, (s, c) in p[f].items():
+                acc = dst.get(k)
+                if acc is None:
+                    dst[k] = [s, c]
+                else:
+                    acc[0] += s; acc[1] += c
+    return out
+
+# ---------- Driver ----------
+def _workers(workers: int | None) -> int:
+    return max(1, workers or os.cpu_count() or 1)
+
+def aggregate_books(books: Iterable[dict], fields: Sequence[str] = ALL_FIELDS) -> dict:
+    """Agregasi katalog yang sudah di memori: satu pass di proses ini (lihat catatan modul)."""
+    return aggregate_chunk(books, tuple(fields))
+
+# ---------- Driver: JSON Lines / segmen ----------
+def _aggregate_jsonl_range(path: str, start: int, end: int, fields: Sequence[str]) -> dict:
+    """Agregasi baris yang DIMULAI di rentang byte [start, end)."""
+    p = new_partial(fields)
+    with open(path, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()  # lewati sisa baris milik rentang sebelumnya
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                _add_book(p, json.loads(line), fields)
+    return p
+
+def _byte_ranges(size: int, n: int) -> list[tuple[int, int]]:
+    step = -(-size // n) if size else 1
+    return [(s, min(size, s + step)) for s in range(0, size, step)]
+
+def aggregate_jsonl(paths: str | Sequence[str], fields: Sequence[str] = ALL_FIELDS,
+                    workers: int | None = None, min_bytes: int = JSONL_MIN_BYTES) -> dict:
+    """
+    Agregasi katalog JSON Lines (satu buku per baris). `paths` boleh satu file
+    atau daftar segmen; urutan segmen = urutan katalog.
+    File besar dipecah per rentang byte sehingga tiap worker mem-parse bagiannya sendiri.
+    """
+    fields = tuple(fields)
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    w = _workers(workers)
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        n = w if size >= min_bytes else 1
+        tasks.extend((path, s, e) for s, e in _byte_ranges(size, n))
+    if w == 1 or len(tasks) <= 1:
+        return merge_partials((_aggregate_jsonl_range(p, s, e, fields) for p, s, e in tasks), fields)
+    with ProcessPoolExecutor(max_workers=min(w, len(tasks))) as ex:
+        parts = list(ex.map(_aggregate_jsonl_range, *zip(*tasks), [fields] * len(tasks)))
+    return merge_partials(parts, fields)
+
+def write_jsonl(books: Iterable[dict], path: str) -> int:
+    """Simpan katalog sebagai JSON Lines (input untuk `aggregate_jsonl`)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for b in books:
+            f.write(json.dumps(b, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+# ---------- Hasil akhir (format sama dengan report/analytics lama) ----------
+def status_summary(agg: dict) -> dict:
+    borrowed = agg["status"].get("borrowed", 0)
+    return {
+        "total_buku_aktif": agg["total"],
+        "buku_tersedia": agg["total"] - borrowed,
+        "buku_dipinjam": borrowed,
+    }
+
+def top_rows(agg: dict, field: str, top_n: int) -> list[dict]:
+    """
+    Top-N dari partial hasil merge:
+    - field 'judul' → per buku, urut (-total_dipinjam, judul).
+    - 'penulis'/'penerbit' → sum `dipinjam` + jumlah_judul, urut (-total, -jumlah_judul, baris).
+    Seleksi pakai heapq.nsmallest (O(n log N)); hasilnya setara sorted(...)[:N] termasuk urutan seri.
+    """
+    top_n = max(1, top_n)
+    if field == "judul":
+        rows = ({"judul": j, "total_dipinjam": n} for j, n, _ in agg["judul"])
+        return heapq.nsmallest(top_n, rows, key=lambda r: (-r["total_dipinjam"], r["judul"].lower()))
+    rows = []
+    for k, (s, c) in agg[field].items():
+        r = {field: k, "total_dipinjam": s}
+        if field in GROUP_FIELDS:
+            r["jumlah_judul"] = c
+        rows.append(r)
+    return heapq.nsmallest(top_n, rows,
+                           key=lambda r: (-r["total_dipinjam"], -(r.get("jumlah_judul") or 0), str(r)))
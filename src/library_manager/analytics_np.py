@@ -0,0 +1,178 @@
+# src/library_manager/analytics_np.py
+"""
+Analytics berbasis NumPy (opsional) untuk statistik katalog.
+
+Ide utama:
+- Kolom array (tahun, dipinjam, status, kode penulis/penerbit) dibangun SEKALI
+  per versi katalog (`columns_for`) lalu dipakai ulang oleh semua laporan.
+- Semua statistik dihitung vektor (bincount/percentile/reduceat), bukan loop Python.
+
+Laporan:
+- `year_histogram`      : distribusi tahun terbit (per tahun atau per bin).
+- `borrow_percentiles`  : persentil counter `dipinjam`.
+- `decade_stats`        : statistik per dekade terbit.
+- `publisher_stats`     : statistik per penerbit.
+- `top_n`               : Top-N penulis/penerbit/judul (urutan identik dengan `analytics.top_rows`).
+
+NumPy bersifat opsional: jika tidak terpasang, `HAS_NUMPY` = False dan caller
+memberi info ke user (pola sama seperti export .xlsx tanpa openpyxl).
+"""
+
+from __future__ import annotations
+from typing import Hashable, Sequence
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - tergantung environment
+    np = None
+    HAS_NUMPY = False
+
+from .analytics import GROUP_FIELDS, UNKNOWN
+
+PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+# ---------- Kolom per versi katalog ----------
+_CACHE: dict = {"version": None, "cols": None}
+
+def build_columns(books: Sequence[dict]) -> dict:
+    """Satu pass Python → kolom array + kamus kode untuk penulis/penerbit."""
+    n = len(books)
+    tahun = np.empty(n, dtype=np.int64)
+    dipinjam = np.empty(n, dtype=np.int64)
+    borrowed = np.empty(n, dtype=bool)
+    judul: list = [None] * n
+    codes = {f: np.empty(n, dtype=np.int64) for f in GROUP_FIELDS}
+    lookup: dict = {f: {} for f in GROUP_FIELDS}
+    for i, b in enumerate(books):
+        try:
+            tahun[i] = int(b.get("tahun") or 0)
+        except (TypeError, ValueError):
+            tahun[i] = 0
+        dipinjam[i] = int(b.get("dipinjam", 0))
+        borrowed[i] = b.get("status") == "borrowed"
+        judul[i] = b.get("judul")
+        for f in GROUP_FIELDS:
+            k = (b.get(f) or "").strip() or UNKNOWN
+            codes[f][i] = lookup[f].setdefault(k, len(lookup[f]))
+    return {
+        "n": n, "tahun": tahun, "dipinjam": dipinjam, "borrowed": borrowed, "judul": judul,
+        "codes": codes, "names": {f: list(lookup[f]) for f in GROUP_FIELDS},
+    }
+
+def columns_for(books: Sequence[dict], version: Hashable) -> dict:
+    """Kolom untuk `version`; dibangun ulang hanya jika versi katalog berubah."""
+    if _CACHE["version"] != version or _CACHE["cols"] is None:
+        _CACHE["cols"] = build_columns(books)
+        _CACHE["version"] = version
+    return _CACHE["cols"]
+
+def cached_columns(version: Hashable) -> dict | None:
+    """Kolom yang sudah ada untuk `version` (None jika belum dibangun)."""
+    return _CACHE["cols"] if _CACHE["version"] == version else None
+
+# ---------- Distribusi & persentil ----------
+def year_histogram(cols: dict, bin_width: int = 1) -> list[dict]:
+    """Jumlah buku per tahun terbit (atau per rentang `bin_width` tahun)."""
+    t = cols["tahun"][cols["tahun"] > 0]
+    if t.size == 0:
+        return []
+    start = (int(t.min()) // bin_width) * bin_width
+    counts = np.bincount((t - start) // bin_width)
+    idx = np.flatnonzero(counts)
+    if bin_width == 1:
+        return [{"tahun": start + int(i), "jumlah_buku": int(counts[i])} for i in idx]
+    return [{"rentang_tahun": f"{start + int(i) * bin_width}-{start + (int(i) + 1) * bin_width - 1}",
+             "jumlah_buku": int(counts[i])} for i in idx]
+
+def borrow_percentiles(cols: dict, qs: Sequence[int] = PERCENTILES) -> list[dict]:
+    """Persentil + min/rata-rata/maks counter `dipinjam`."""
+    d = cols["dipinjam"]
+    if d.size == 0:
+        return []
+    rows = [{"statistik": "min", "dipinjam": int(d.min())}]
+    for q, v in zip(qs, np.percentile(d, qs)):
+        rows.append({"statistik": f"p{q}", "dipinjam": round(float(v), 2)})
+    rows.append({"statistik": "rata_rata", "dipinjam": round(float(d.mean()), 2)})
+    rows.append({"statistik": "maks", "dipinjam": int(d.max())})
+    return rows
+
+# ---------- Statistik per grup ----------
+def _group_stats(codes, cols: dict) -> dict:
+    """count/sum/max/borrowed per kode grup (kode 0..k-1) secara vektor."""
+    d, br = cols["dipinjam"], cols["borrowed"]
+    k = int(codes.max()) + 1 if codes.size else 0
+    count = np.bincount(codes, minlength=k)
+    total = np.bincount(codes, weights=d, minlength=k).astype(np.int64)
+    aktif = np.bincount(codes, weights=br, minlength=k).astype(np.int64)
+    order = np.argsort(codes, kind="stable")
+    present = np.flatnonzero(count)
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))[present]
+    maks = np.zeros(k, dtype=np.int64)
+    if present.size:
+        maks[present] = np.maximum.reduceat(d[order], starts)
+    return {"count": count, "total": total, "aktif": aktif, "maks": maks, "present": present}
+
+def decade_stats(cols: dict) -> list[dict]:
+    """Per dekade terbit: jumlah buku, total/rata-rata/maks dipinjam, sedang dipinjam."""
+    mask = cols["tahun"] > 0
+    if not mask.any():
+        return []
+    dec = cols["tahun"][mask] // 10
+    base = int(dec.min())
+    sub = {"dipinjam": cols["dipinjam"][mask], "borrowed": cols["borrowed"][mask]}
+    g = _group_stats(dec - base, sub)
+    return [{
+        "dekade": f"{(base + int(i)) * 10}-an",
+        "jumlah_buku": int(g["count"][i]),
+        "total_dipinjam": int(g["total"][i]),
+        "rata_dipinjam": round(float(g["total"][i] / g["count"][i]), 2),
+        "maks_dipinjam": int(g["maks"][i]),
+        "sedang_dipinjam": int(g["aktif"][i]),
+    } for i in g["present"]]
+
+def publisher_stats(cols: dict) -> list[dict]:
+    """Per penerbit (urut total dipinjam terbesar): jumlah judul, total/rata-rata/maks, sedang dipinjam."""
+    g = _group_stats(cols["codes"]["penerbit"], cols)
+    names = cols["names"]["penerbit"]
+    order = g["present"][np.lexsort((g["present"], -g["count"][g["present"]], -g["total"][g["present"]]))]
+    return [{
+        "penerbit": names[i],
+        "jumlah_judul": int(g["count"][i]),
+        "total_dipinjam": int(g["total"][i]),
+        "rata_dipinjam": round(float(g["total"][i] / g["count"][i]), 2),
+        "maks_dipinjam": int(g["maks"][i]),
+        "sedang_dipinjam": int(g["aktif"][i]),
+    } for i in order]
+
+# ---------- Top-N ----------
+def top_n(cols: dict, field: str, n: int) -> list[dict]:
+    """
+    Top-N tervektor. Kandidat dipilih dengan partition/bincount, lalu hanya kandidat
+    (termasuk yang seri di batas) diurutkan dengan kunci yang sama seperti `analytics.top_rows`.
+    """
+    n = max(1, n)
+    if cols["n"] == 0:
+        return []
+    if field == "judul":
+        d = cols["dipinjam"]
+        cut = d[np.argpartition(-d, min(n, d.size) - 1)[min(n, d.size) - 1]] if d.size > n else d.min()
+        idx = np.flatnonzero(d >= cut)  # urutan katalog dipertahankan → sort stabil sama
+        rows = [{"judul": cols["judul"][i], "total_dipinjam": int(d[i])} for i in idx]
+        rows.sort(key=lambda r: (-r["total_dipinjam"], r["judul"].lower()))
+        return rows[:n]
+
+    codes = cols["codes"][field]
+    k = len(cols["names"][field])
+    total = np.bincount(codes, weights=cols["dipinjam"], minlength=k).astype(np.int64)
+    count = np.bincount(codes, minlength=k)
+    if k > n:
+        order = np.lexsort((-count, -total))
+        t_cut, c_cut = total[order[n - 1]], count[order[n - 1]]
+        cand = np.flatnonzero((total > t_cut) | ((total == t_cut) & (count >= c_cut)))
+    else:
+        cand = np.arange(k)
+    names = cols["names"][field]
+    rows = [{field: names[i], "total_dipinjam": int(total[i]), "jumlah_judul": int(count[i])} for i in cand]
+    rows.sort(key=lambda r: (-r["total_dipinjam"], -(r.get("jumlah_judul") or 0), str(r)))
+    return rows[:n]
@@ -0,0 +1,217 @@
+# src/library_manager/changes.py
+"""
+Change feed (change-data-capture) untuk sinkronisasi inkremental.
+
+Setiap mutasi (add, update, delete, borrow, return) dicatat sebagai satu baris di
+`data/changes.jsonl` dengan nomor urut `seq` yang naik monoton:
+
+    {"seq": 42, "op": "borrow", "id": 7, "ts": "2025-01-31T10:00:00", "book": {...}}
+
+`book` berisi data buku SESUDAH perubahan (untuk `delete`: data terakhir sebelum dihapus).
+
+Export inkremental (`library-cli export --since <seq>`):
+- posisi awal dicari dengan binary search pada offset byte (baris urut menurut seq),
+  jadi biaya ∝ jumlah perubahan sejak checkpoint, bukan ukuran katalog/riwayat feed;
+- default satu baris per buku (perubahan terakhir); `events=True` → semua event;
+- checkpoint per konsumen disimpan di `data/changes_checkpoint.json`.
+
+Penulisan dikunci (`locked`: `fcntl.flock` pada `<feed>.lock`, jika tersedia) agar seq tetap
+unik walau beberapa proses (meja sirkulasi, mode scan) menulis bersamaan. services.py memegang
+kunci yang sama selama tulis katalog + `append`, sehingga urutan seq = urutan commit.
+"""
+
+from __future__ import annotations
+import csv
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, TextIO
+
+from .snapshot import write_json_atomic
+
+try:
+    import fcntl  # POSIX
+except ImportError:  # pragma: no cover - Windows: tanpa kunci antar proses
+    fcntl = None
+
+OPS = ("add", "update", "delete", "borrow", "return")
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHECKPOINT = "default"
+_TAIL_CHUNK = 4096
+
+
+# ---------- Kunci tulis ----------
+_LOCK = threading.RLock()
+_HELD: dict[str, list] = {}  # path → [file kunci, kedalaman] (reentrant di proses ini)
+
+@contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Kunci eksklusif antar proses & thread untuk feed `path`; boleh bersarang di thread yang sama."""
+    with _LOCK:
+        held = _HELD.get(path)
+        if held is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            f = open(f"{path}.lock", "a")
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            held = _HELD[path] = [f, 0]
+        held[1] += 1
+        try:
+            yield
+        finally:
+            held[1] -= 1
+            if held[1] == 0:
+                del _HELD[path]
+                held[0].close()  # melepas flock
+
+# ---------- Tulis ----------
+def _parse_seq(line: bytes) -> int | None:
+    try:
+        return int(json.loads(line)["seq"])
+    except (ValueError, KeyError, TypeError):
+        return None  # baris rusak/terpotong (mis. crash saat menulis)
+
+def last_seq(path: str) -> int:
+    """Seq terakhir di feed (0 jika feed kosong/belum ada). Hanya membaca ekor file."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return 0
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        pos, tail = end, b""
+        while pos > 0:
+            step = min(_TAIL_CHUNK, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            lines = [ln for ln in tail.split(b"\n") if ln.strip()]
+            # baris pertama chunk bisa terpotong → butuh minimal 2 baris kecuali sudah di awal file
+            for ln in reversed(lines[1:] if pos > 0 else lines):
+                seq = _parse_seq(ln)
+                if seq is not None:
+                    return seq
+    return 0
+
+def append(path: str, op: str, books: Iterable[dict]) -> list[int]:
+    """Catat perubahan `op` untuk tiap buku. Return daftar seq yang diberikan."""
+    if op not in OPS:
+        raise ValueError(f"Operasi tidak dikenal: {op!r} (pilih: {', '.join(OPS)})")
+    books = list(books)
+    if not books:
+        return []
+    ts = datetime.now().isoformat(timespec="seconds")
+    with locked(path), open(path, "a", encoding="utf-8") as f:
+        seq = last_seq(path)
+        seqs, lines = [], []
+        for b in books:
+            seq += 1
+            seqs.append(seq)
+            lines.append(json.dumps({"seq": seq, "op": op, "id": b.get("id"), "ts": ts, "book": dict(b)},
+                                    ensure_ascii=False))
+        f.write("\n".join(lines) + "\n")
+        f.flush()
+    return seqs
+
+# ---------- Baca ----------
+def _line_at(f, pos: int) -> tuple[int, int | None]:
+    """(offset, seq) baris pertama yang DIMULAI di/ setelah `pos`; seq None = EOF."""
+    if pos > 0:
+        f.seek(pos - 1)
+        f.readline()
+    else:
+        f.seek(0)
+    while True:
+        start = f.tell()
+        line = f.readline()
+        if not line:
+            return start, None
+        if line.strip():
+            return start, _parse_seq(line)
+
+def seek_after(f, since: int) -> int:
+    """Offset baris pertama dengan seq > `since` (binary search, O(log ukuran feed))."""
+    lo, hi = 0, f.seek(0, os.SEEK_END)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        _, seq = _line_at(f, mid)
+        if seq is None or seq > since:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _line_at(f, lo)[0]
+
+def read_since(path: str, since: int = 0) -> Iterator[dict]:
+    """Event dengan seq > `since`, urut seq."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(seek_after(f, since))
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                ev = json.loads(line)
+            except ValueError:
+                continue  # ekor terpotong
+            if ev.get("seq", 0) > since:
+                yield ev
+
+def compact(events: Iterable[dict]) -> list[dict]:
+    """Satu event per buku (yang terakhir), urut seq."""
+    latest: dict = {}
+    for ev in events:
+        latest.pop(ev.get("id"), None)  # pindahkan ke belakang (urutan seq terakhir)
+        latest[ev.get("id")] = ev
+    return list(latest.values())
+
+def _flat(ev: dict) -> dict:
+    row = {"seq": ev.get("seq"), "op": ev.get("op"), "ts": ev.get("ts")}
+    row.update(ev.get("book") or {"id": ev.get("id")})
+    return row
+
+def write_feed(events: Iterable[dict], out: TextIO, fmt: str = "csv") -> tuple[int, int]:
+    """
+    Tulis event ke `out`: jsonl → satu event per baris (streaming);
+    csv → seq, op, ts + kolom buku (header = union key). Return (jumlah baris, seq terakhir).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format tidak dikenal: {fmt!r} (pilih: {', '.join(FORMATS)})")
+    n = last = 0
+    if fmt == "jsonl":
+        for ev in events:
+            out.write(json.dumps(ev, ensure_ascii=False) + "\n")
+            n += 1; last = max(last, ev.get("seq", 0))
+        return n, last
+    rows = [_flat(ev) for ev in events]
+    if not rows:
+        return 0, 0
+    fieldnames, seen = [], set()
+    for r in rows:
+        for k in r:
+            if k not in seen:
+                seen.add(k); fieldnames.append(k)
+    w = csv.DictWriter(out, fieldnames=fieldnames)
+    w.writeheader()
+    w.writerows(rows)
+    return len(rows), max(r["seq"] for r in rows)
+
+# ---------- Checkpoint ----------
+def _read_checkpoints(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def load_checkpoint(path: str, name: str = DEFAULT_CHECKPOINT) -> int:
+    return int(_read_checkpoints(path).get(name, {}).get("seq", 0))
+
+def save_checkpoint(path: str, name: str, seq: int) -> None:
+    data = _read_checkpoints(path)
+    data[name] = {"seq": seq, "at": datetime.now().isoformat(timespec="seconds")}
+    write_json_atomic(path, data)
@@ -0,0 +1,146 @@
+# src/library_manager/charts.py
+"""
+Backend chart untuk export (bar chart berwarna + label angka).
+
+Backend:
+- "svg" : penulis SVG bawaan (tanpa dependency) → cepat, cocok untuk batch report.
+- "png" : matplotlib (Agg, 10×6 inci, 150 dpi) → perilaku lama; butuh `matplotlib`.
+- "auto": png jika matplotlib terpasang, selain itu svg (default → output lama tidak berubah
+  bagi yang sudah memasang matplotlib).
+
+Pilih via env `LIBRARY_CHART_BACKEND`, `charts.BACKEND`, atau `library-cli report --all --chart svg`.
+Keduanya memakai palet tab20, label angka di atas batang, dan label sumbu-x miring 20°.
+"""
+
+from __future__ import annotations
+import importlib.util
+import os
+from xml.sax.saxutils import escape
+
+BACKENDS = ("auto", "png", "svg")
+BACKEND = os.environ.get("LIBRARY_CHART_BACKEND", "auto").lower()
+
+# Palet tab20 (urutan sama dengan matplotlib)
+TAB20 = [
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c", "#98df8a", "#d62728", "#ff9896",
+    "#9467bd", "#c5b0d5", "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f", "#c7c7c7",
+    "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+]
+
+def palette(n: int) -> list[str]:
+    """Palet warna (tab20), siklik jika n>20."""
+    return [TAB20[i % 20] for i in range(n)]
+
+def has_matplotlib() -> bool:
+    return importlib.util.find_spec("matplotlib") is not None
+
+def resolve_backend(backend: str | None = None) -> str:
+    """Default 'auto' → 'png' bila matplotlib ada, selain itu 'svg'."""
+    b = (backend or BACKEND or "auto").lower()
+    if b not in BACKENDS:
+        print(f"Info: backend chart '{b}' tidak dikenal → pakai 'svg'.")
+        return "svg"
+    if b == "png" and not has_matplotlib():
+        print("Info: 'matplotlib' belum terpasang → chart disimpan sebagai SVG.")
+        return "svg"
+    if b == "auto":
+        return "png" if has_matplotlib() else "svg"
+    return b
+
+# ---------- SVG (tanpa dependency) ----------
+SVG_W, SVG_H = 1000, 600
+_M_LEFT, _M_RIGHT, _M_TOP, _M_BOTTOM = 80, 20, 50, 150
+
+def _nice_step(vmax: float, ticks: int = 5) -> float:
+    """Jarak tick 'bulat' (1/2/5 × 10^k)."""
+    if vmax <= 0:
+        return 1
+    raw = vmax / ticks
+    mag = 10 ** (len(str(int(raw))) - 1) if raw >= 1 else 1
+    for m in (1, 2, 5, 10):
+        if raw <= m * mag:
+            return m * mag
+    return 10 * mag
+
+def save_bar_svg(labels: list[str], values: list[float], title: str, path: str,
+                 xlabel: str = "", ylabel: str = "Jumlah") -> str:
+    """Tulis bar chart sebagai SVG; satu kali tulis string, tanpa import berat."""
+    plot_w = SVG_W - _M_LEFT - _M_RIGHT
+    plot_h = SVG_H - _M_TOP - _M_BOTTOM
+    vmax = max([v for v in values if v is not None] + [0])
+    step = _nice_step(vmax)
+    top = step * (int(vmax // step) + 1)
+    y = lambda v: _M_TOP + plot_h - (v / top) * plot_h
+    n = max(1, len(labels))
+    slot = plot_w / n
+    bar_w = slot * 0.8
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_W}" height="{SVG_H}" '
+        f'viewBox="0 0 {SVG_W} {SVG_H}" font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="{SVG_W}" height="{SVG_H}" fill="white"/>',
+        f'<text x="{SVG_W / 2:.1f}" y="30" text-anchor="middle" font-size="16">{escape(title)}</text>',
+    ]
+    # sumbu & tick Y
+    tick = 0.0
+    while tick <= top + 1e-9:
+        ty = y(tick)
+        out.append(f'<line x1="{_M_LEFT - 4}" y1="{ty:.1f}" x2="{_M_LEFT}" y2="{ty:.1f}" stroke="black"/>')
+        out.append(f'<text x="{_M_LEFT - 8}" y="{ty + 4:.1f}" text-anchor="end" font-size="11">{tick:g}</text>')
+        tick += step
+    out.append(f'<line x1="{_M_LEFT}" y1="{_M_TOP}" x2="{_M_LEFT}" y2="{_M_TOP + plot_h}" stroke="black"/>')
+    out.append(f'<line x1="{_M_LEFT}" y1="{_M_TOP + plot_h}" x2="{_M_LEFT + plot_w}" '
+               f'y2="{_M_TOP + plot_h}" stroke="black"/>')
+    # batang + label angka + label x (miring 20°, rata kanan)
+    for i, (lab, v, color) in enumerate(zip(labels, values, palette(len(labels)))):
+        v = v or 0
+        x = _M_LEFT + i * slot + (slot - bar_w) / 2
+        by = y(v)
+        cx = x + bar_w / 2
+        out.append(f'<rect x="{x:.1f}" y="{by:.1f}" width="{bar_w:.1f}" height="{_M_TOP + plot_h - by:.1f}" '
+                   f'fill="{color}" stroke="black" stroke-width="0.5"/>')
+        out.append(f'<text x="{cx:.1f}" y="{by - 3:.1f}" text-anchor="middle" font-size="12">{int(v)}</text>')
+        ly = _M_TOP + plot_h + 14
+        out.append(f'<text x="{cx:.1f}" y="{ly:.1f}" text-anchor="end" font-size="11" '
+                   f'transform="rotate(-20 {cx:.1f} {ly:.1f})">{escape(str(lab))}</text>')
+    if xlabel:
+        out.append(f'<text x="{_M_LEFT + plot_w / 2:.1f}" y="{SVG_H - 12}" text-anchor="middle" '
+                   f'font-size="13">{escape(xlabel)}</text>')
+    if ylabel:
+        out.append(f'<text x="18" y="{_M_TOP + plot_h / 2:.1f}" text-anchor="middle" font-size="13" '
+                   f'transform="rotate(-90 18 {_M_TOP + plot_h / 2:.1f})">{escape(ylabel)}</text>')
+    out.append("</svg>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+    return path
+
+# ---------- PNG (matplotlib) ----------
+def save_bar_png(labels: list[str], values: list[float], title: str, path: str,
+                 xlabel: str = "", ylabel: str = "Jumlah") -> str:
+    """Perilaku lama: matplotlib Agg, 10×6 inci, 150 dpi. matplotlib di-import saat dibutuhkan saja."""
+    import matplotlib
+    matplotlib.use("Agg")  # non-GUI (menyimpan ke file)
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    bars = plt.bar(labels, values, color=palette(len(labels)), edgecolor="black", linewidth=0.5)
+    plt.title(title)
+    if xlabel: plt.xlabel(xlabel)
+    if ylabel: plt.ylabel(ylabel)
+    plt.xticks(rotation=20, ha="right")
+    # label angka di atas batang
+    for b in bars:
+        h = b.get_height()
+        plt.text(b.get_x() + b.get_width()/2, h, f"{int(h)}", ha="center", va="bottom", fontsize=9)
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+    plt.close()
+    return path
+
+def save_bar(labels: list[str], values: list[float], title: str, out_dir: str, stem: str,
+             xlabel: str = "", ylabel: str = "Jumlah", backend: str | None = None) -> str:
+    """Simpan chart ke `out_dir/stem.<png|svg>` sesuai backend. Return path file."""
+    b = resolve_backend(backend)
+    path = os.path.join(out_dir, f"{stem}.{b}")
+    writer = save_bar_png if b == "png" else save_bar_svg
+    return writer(labels, values, title, path, xlabel=xlabel, ylabel=ylabel)
@@ -6,21 +6,86 @@ Tanggung jawab file ini:
 - Menampilkan menu & sub-menu.
 - Memanggil layanan di services.py.
 - Konsisten dengan UX: re-prompt lokal & batal cepat (0).
+- Mode non-interaktif (untuk job terjadwal), mis. `library-cli report --all`.
 """
 
+import argparse
+import sys
+
 from tabulate import tabulate
-from .utils import ask_choice, ask_int, ask_str
+from . import changes, charts, jobs, shards
+from .scan import BATCH, INTERVAL_MS, MODES, ScanSession, run_scan_prompt, run_scan_stream
+from .utils import ask_choice, ask_int, ask_str, ask_yes_no
+from .pager import COLUMNS, show_rows
 from .services import (
     # Query
-    get_all_books, find_book_by_id, filter_books_by_field, search_books_keyword,
+    get_all_books, find_book_by_id, filter_books_by_field, search_books_keyword, query_books,
     # Mutasi
     add_book, update_book, delete_book, borrow_book, return_book,
     # Report & Analytics
-    report_summary, report_export_to_csv,
+    report_summary,
     analytics_top_authors, analytics_top_publishers, analytics_top_titles,
-    export_top_authors, export_top_publishers, export_top_titles,
+    analytics_stats, export_all_reports, export_changes,
+    # Shard
+    shard_split, shard_status, shard_join,
 )
 
+# pilihan menu → kind statistik NumPy (lihat services.STATS_REPORTS)
+STATS_MENU = {"1": "tahun", "2": "persentil", "3": "dekade", "4": "penerbit"}
+ANALYTICS_STATS_MENU = {"4": "tahun", "5": "persentil", "6": "dekade", "7": "penerbit"}  # pilihan sub-menu Analytics
+
+_SKIP = object()  # penanda "kriteria dilewati" (Enter kosong)
+
+def _ask_optional_str(prompt: str):
+    """Teks opsional: Enter → _SKIP, 0 → None (batal), lainnya → teks."""
+    s = ask_str(f"{prompt} [Enter=lewati]", allow_empty=True)
+    if s is None: return None
+    return s if s else _SKIP
+
+def _ask_optional_int(prompt: str):
+    """Angka opsional dengan re-prompt: Enter → _SKIP, 0 → None (batal)."""
+    while True:
+        s = _ask_optional_str(prompt)
+        if s is None or s is _SKIP: return s
+        try:
+            return int(s)
+        except ValueError:
+            print("Input harus berupa angka bulat. Coba lagi.")
+
+def _query_form() -> None:
+    """Form query gabungan (AND): isi kriteria yang perlu saja, Enter untuk melewati."""
+    criteria = {}
+    for field in ("penulis", "penerbit", "status", "keyword"):
+        v = _ask_optional_str(f"{field.capitalize()} (exact)" if field != "keyword" else "Keyword (contains)")
+        if v is None: print("Dibatalkan."); return
+        if v is not _SKIP: criteria[field] = v
+    for key, label in (("tahun_min", "Tahun dari"), ("tahun_max", "Tahun sampai")):
+        v = _ask_optional_int(label)
+        if v is None: print("Dibatalkan."); return
+        if v is not _SKIP: criteria[key] = v
+
+    sort, desc = None, False
+    cols = {str(i): f for i, (f, _, _) in enumerate(COLUMNS, start=1)}
+    print("Urutkan: " + "  ".join(f"{i}.{h}" for i, (_, h, _) in enumerate(COLUMNS, start=1)))
+    k = _ask_optional_str("Kolom urut (nomor)")
+    if k is None: print("Dibatalkan."); return
+    if k is not _SKIP:
+        if k not in cols:
+            print("Kolom tidak valid → tanpa pengurutan.")
+        else:
+            sort = cols[k]
+            yn = ask_yes_no("Urut menurun (besar → kecil)?")
+            if yn is None: print("Dibatalkan."); return
+            desc = yn
+    limit = _ask_optional_int("Batas jumlah hasil")
+    if limit is None: print("Dibatalkan."); return
+
+    rows, steps = query_books(sort=sort, desc=desc,
+                              limit=None if limit is _SKIP else limit, **criteria)
+    print("Rencana: " + " → ".join(steps))
+    if rows: show_rows(rows, "Hasil Query")
+    else: print("Tidak ada hasil.")
+
 def submenu_read() -> None:
     while True:
         print("\nSUB-MENU: Koleksi Buku (Read)")
@@ -28,13 +93,15 @@ def submenu_read() -> None:
         print("2. Cari Buku by ID (exact)")
         print("3. Filter Exact (judul/penulis/penerbit/tahun/status)")
         print("4. Cari Keyword (judul/penulis/penerbit)")
+        print("5. Query Gabungan (penulis/penerbit/status/tahun/keyword + urut & limit)")
         print("0. Kembali")
-        c = ask_choice({"1", "2", "3", "4"})
+        c = ask_choice({"1", "2", "3", "4", "5"})
         if c is None:
             return
         if c == "1":
             rows = get_all_books()
-            print(tabulate(rows, headers="keys", tablefmt="grid") if rows else "Belum ada data buku.")
+            if rows: show_rows(rows, "Semua Buku")
+            else: print("Belum ada data buku.")
         elif c == "2":
             while True:
                 bid = ask_int("Masukkan ID buku")
@@ -54,7 +121,8 @@ def submenu_read() -> None:
                 val = ask_str(f"Nilai exact untuk '{field}'")
                 if val is None: break
                 rows = filter_books_by_field(field, val)
-                print(tabulate(rows, headers="keys", tablefmt="grid") if rows else "Tidak ada hasil.")
+                if rows: show_rows(rows, f"Filter {field} = {val}")
+                else: print("Tidak ada hasil.")
                 break
         elif c == "4":
             while True:
@@ -62,8 +130,10 @@ def submenu_read() -> None:
                 if kw is None: break
                 rows = search_books_keyword(kw)
                 if rows:
-                    print(tabulate(rows, headers="keys", tablefmt="grid")); break
+                    show_rows(rows, f"Keyword '{kw}'"); break
                 print("Tidak ada hasil. Coba keyword lain atau 0 untuk batal.")
+        elif c == "5":
+            _query_form()
 
 def submenu_create() -> None:
     while True:
@@ -92,29 +162,72 @@ def submenu_delete() -> None:
         if c is None: return
         delete_book()
 
+def _scan_summary(stats: dict) -> None:
+    print(f"Selesai: {stats['scan']} scan, {stats['ok']} berhasil, "
+          f"{stats['gagal']} gagal, {stats['commit']} commit.")
+
+def _scan_interactive() -> None:
+    """Mode scan dari menu: satu ID per baris, 0 untuk selesai (commit otomatis per batch/waktu)."""
+    m = ask_choice({"1", "2"}, "Mode scan: 1.Pinjam 2.Kembalikan")
+    if m is None: return
+    session = ScanSession("borrow" if m == "1" else "return")
+    print(f"Scan ID buku (satu per baris). Commit tiap {session.batch} scan / "
+          f"{int(session.interval * 1000)} ms. Ketik 0 untuk selesai.")
+    try:
+        stats = run_scan_prompt(session)
+    except KeyboardInterrupt:
+        print("\nDihentikan (Ctrl-C). Scan tertunda sudah disimpan.")
+        stats = session.stats
+    _scan_summary(stats)
+
 def submenu_borrowing() -> None:
     while True:
         print("\nSUB-MENU: Peminjaman")
         print("1. Pinjam Buku")
         print("2. Kembalikan Buku")
+        print("3. Mode Scan Barcode (beruntun)")
         print("0. Kembali")
-        c = ask_choice({"1", "2"})
+        c = ask_choice({"1", "2", "3"})
         if c is None: return
-        borrow_book() if c == "1" else return_book()
+        if c == "3": _scan_interactive()
+        elif c == "1": borrow_book()
+        else: return_book()
+
+def _submit_export(kind: str, *args) -> None:
+    """Antrekan export ke worker latar belakang; terminal langsung bisa dipakai lagi."""
+    job_id, new = jobs.submit(kind, *args)
+    if new:
+        print(f"Job #{job_id} diantrekan. Lanjutkan pekerjaan; cek status di Report → 5.")
+    else:
+        print(f"Job identik #{job_id} masih berjalan/antri → tidak diantrekan ulang.")
+
+def _show_jobs() -> None:
+    rows = jobs.job_rows()
+    if not rows: print("Belum ada job export."); return
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
 
 def submenu_report() -> None:
     while True:
+        active = jobs.pending_count()
         print("\nSUB-MENU: Report (katalog saat ini)")
         print("1. Tampilkan Ringkasan")
-        print("2. Export Ringkasan → CSV + Chart")
-        print("3. Export Analytics Top-N → CSV/XLSX + Chart")
+        print("2. Export Ringkasan → CSV + Chart (latar belakang)")
+        print("3. Export Analytics Top-N → CSV/XLSX + Chart (latar belakang)")
+        print("4. Export Statistik Katalog → CSV/XLSX + Chart (latar belakang)")
+        print(f"5. Status Job Export{f' ({active} aktif)' if active else ''}")
         print("0. Kembali")
-        c = ask_choice({"1", "2", "3"})
+        c = ask_choice({"1", "2", "3", "4", "5"})
         if c is None: return
         if c == "1":
             report_summary()
         elif c == "2":
-            report_export_to_csv()
+            _submit_export("ringkasan")
+        elif c == "5":
+            _show_jobs()
+        elif c == "4":
+            kind = ask_choice(set(STATS_MENU), "Pilih: 1.Tahun Terbit 2.Persentil 3.Dekade 4.Penerbit")
+            if kind is None: continue
+            _submit_export("statistik", STATS_MENU[kind])
         else:
             kind = ask_choice({"1", "2", "3"}, "Pilih: 1.Penulis 2.Penerbit 3.Judul")
             if kind is None:  # batal internal
@@ -124,9 +237,7 @@ def submenu_report() -> None:
                 if n is None: break
                 if n <= 0:
                     print("N harus > 0."); continue
-                if kind == "1": export_top_authors(n)
-                elif kind == "2": export_top_publishers(n)
-                else: export_top_titles(n)
+                _submit_export({"1": "top_penulis", "2": "top_penerbit", "3": "top_judul"}[kind], n)
                 break
 
 def submenu_analytics() -> None:
@@ -135,9 +246,15 @@ def submenu_analytics() -> None:
         print("1. Top-N Penulis (sum 'dipinjam')")
         print("2. Top-N Penerbit (sum 'dipinjam')")
         print("3. Top-N Judul (sum 'dipinjam')")
+        print("4. Distribusi Tahun Terbit")
+        print("5. Persentil 'dipinjam'")
+        print("6. Statistik per Dekade")
+        print("7. Statistik per Penerbit")
         print("0. Kembali")
-        c = ask_choice({"1", "2", "3"})
+        c = ask_choice({"1", "2", "3", "4", "5", "6", "7"})
         if c is None: return
+        if c in ANALYTICS_STATS_MENU:
+            analytics_stats(ANALYTICS_STATS_MENU[c]); continue
         while True:
             n = ask_int("Masukkan N (contoh 5)")
             if n is None: break
@@ -147,7 +264,102 @@ def submenu_analytics() -> None:
             else: analytics_top_titles(n)
             break
 
-def main() -> None:
+# ---------- Mode non-interaktif ----------
+COMMANDS = {"report", "scan", "shard", "export"}
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="library-cli", description="Library Manager (non-interaktif)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rp = sub.add_parser("report", help="Export report ke folder 'outputs/'")
+    rp.add_argument("--all", action="store_true", dest="all_reports",
+                    help="Semua report (ringkasan, dipinjam, Top-N) dalam satu pass + manifest")
+    rp.add_argument("--top", type=int, default=10, help="N untuk Top-N (default 10)")
+    rp.add_argument("--chart", choices=charts.BACKENDS, default=None,
+                    help="Backend chart: svg (cepat, tanpa matplotlib), png (matplotlib), auto (default)")
+    sp = sub.add_parser("scan", help="Mode scan barcode: ID buku beruntun dari stdin/file")
+    sp.add_argument("--mode", choices=sorted(MODES), required=True, help="borrow (pinjam) / return (kembalikan)")
+    sp.add_argument("--file", default="-", help="File berisi ID per baris (default stdin)")
+    sp.add_argument("--batch", type=int, default=BATCH, help=f"Commit tiap N scan (default {BATCH})")
+    sp.add_argument("--interval-ms", type=int, default=INTERVAL_MS,
+                    help=f"... atau tiap T milidetik (default {INTERVAL_MS})")
+    shp = sub.add_parser("shard", help="Kelola katalog ter-shard (per cabang / rentang ID)")
+    shp.add_argument("action", choices=["split", "status", "join"],
+                     help="split: pecah books.json ke shard; status: ringkasan shard; join: gabung kembali")
+    shp.add_argument("--by", choices=shards.STRATEGIES, default="range", help="Strategi partisi (default range)")
+    shp.add_argument("--size", type=int, default=shards.RANGE_SIZE,
+                     help=f"ID per shard untuk --by range (default {shards.RANGE_SIZE})")
+    shp.add_argument("--field", default=shards.BRANCH_FIELD,
+                     help=f"Field cabang untuk --by branch (default '{shards.BRANCH_FIELD}', diisi lewat form tambah/update buku)")
+    ep = sub.add_parser("export", help="Export inkremental dari change feed (hanya record yang berubah)")
+    ep.add_argument("--since", type=int, default=None,
+                    help="Ambil perubahan dengan seq > SINCE (default: checkpoint terakhir)")
+    ep.add_argument("--format", choices=changes.FORMATS, default="csv", dest="fmt", help="csv (default) / jsonl")
+    ep.add_argument("--out", default="-", help="File tujuan (default stdout)")
+    ep.add_argument("--checkpoint", default=changes.DEFAULT_CHECKPOINT,
+                    help=f"Nama checkpoint konsumen (default '{changes.DEFAULT_CHECKPOINT}')")
+    ep.add_argument("--events", action="store_true",
+                    help="Semua event (default: satu baris per buku, perubahan terakhir)")
+    return parser
+
+def run_command(argv: list[str]) -> int:
+    """Jalankan sub-command non-interaktif. Return exit code."""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "report":
+        if not args.all_reports:
+            parser.error("report: gunakan --all (report tunggal tersedia di menu interaktif)")
+        if args.top <= 0:
+            parser.error("--top harus > 0")
+        if args.chart:
+            charts.BACKEND = args.chart
+        export_all_reports(args.top)
+    elif args.command == "scan":
+        if args.batch <= 0:
+            parser.error("--batch harus > 0")
+        session = ScanSession(args.mode, batch=args.batch, interval_ms=args.interval_ms)
+        try:
+            if args.file == "-":
+                stats = run_scan_stream(sys.stdin, session)
+            else:
+                with open(args.file, encoding="utf-8") as f:
+                    stats = run_scan_stream(f, session)
+        except KeyboardInterrupt:
+            print("\nDihentikan (Ctrl-C). Scan tertunda sudah disimpan.")
+            _scan_summary(session.stats)
+            return 130
+        _scan_summary(stats)
+    elif args.command == "shard":
+        if args.action == "split":
+            if args.size <= 0:
+                parser.error("--size harus > 0")
+            rows = shard_split(args.by, args.size, args.field)
+            if rows is None:  # sudah di-shard; pesan sudah dicetak
+                return 1
+        elif args.action == "join":
+            n = shard_join()
+            print(f"{n} buku digabung kembali ke data/books.json." if n else "Katalog tidak dalam mode shard.")
+            return 0
+        else:
+            rows = shard_status()
+        print(tabulate(rows, headers="keys", tablefmt="grid") if rows else "Katalog tidak dalam mode shard.")
+    elif args.command == "export":
+        if args.since is not None and args.since < 0:
+            parser.error("--since harus >= 0")
+        opts = dict(since=args.since, fmt=args.fmt, checkpoint=args.checkpoint, events=args.events)
+        if args.out == "-":
+            since, new, n = export_changes(out=sys.stdout, **opts)
+        else:
+            with open(args.out, "w", newline="", encoding="utf-8") as f:
+                since, new, n = export_changes(out=f, **opts)
+        # ringkasan ke stderr agar stdout tetap berisi data saja
+        print(f"{n} record berubah (seq {since} → {new}); checkpoint '{args.checkpoint}' = {new}.",
+              file=sys.stderr)
+    return 0
+
+def main(argv: list[str] | None = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    if args and args[0] in COMMANDS:
+        raise SystemExit(run_command(args))
     while True:
         print("\nSISTEM MANAJEMEN PERPUSTAKAAN")
         print("=" * 40)
@@ -162,6 +374,9 @@ def main() -> None:
         print("=" * 40)
         c = ask_choice({"1","2","3","4","5","6","7"})
         if c is None:
+            n = jobs.pending_count()
+            if n: print(f"Menunggu {n} job export selesai...")
+            jobs.shutdown(wait=True)
             print("Sampai jumpa!"); break
         if c == "1": submenu_read()
         elif c == "2": submenu_create()
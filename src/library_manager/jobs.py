@@ -0,0 +1,209 @@
+# src/library_manager/jobs.py
+"""
+Antrian job export di latar belakang (satu proses worker terpisah).
+
+Export besar (CSV/XLSX/chart) tidak lagi memblokir terminal meja sirkulasi:
+- `submit(kind, *args)` → job masuk antrian dan langsung dapat ID.
+- Worker (proses terpisah, dibuat saat job pertama) menjalankan job satu per satu
+  memakai fungsi export yang sama di services.py; output print-nya ditampung, bukan ke layar.
+- Status: antri → berjalan → selesai/gagal, lengkap dengan durasi, path output, dan pesan
+  yang dicetak fungsi export (mis. "Info: 'numpy' belum terpasang ..."). Export yang tidak
+  menghasilkan file sama sekali dianggap gagal dengan pesan itu sebagai alasannya.
+- Job identik (jenis + argumen + versi katalog sama) yang masih antri/berjalan tidak
+  diantrekan ulang → ID job yang sudah ada dikembalikan.
+- Worker BUKAN proses daemon (proses daemon tidak boleh punya anak, padahal agregasi
+  katalog ter-shard memakai ProcessPoolExecutor); ia dihentikan lewat sentinel `None`
+  dan di-join saat keluar (`atexit`), jadi CLI tidak pernah menggantung karenanya.
+
+Lokasi data/output (DATA_FILE, SHARD_DIR, EXPORT_DIR, backend chart) dikirim bersama
+tiap job, jadi worker selalu menulis ke tempat yang sama dengan proses CLI.
+"""
+
+from __future__ import annotations
+import atexit
+import io
+import multiprocessing as mp
+import queue
+import time
+from contextlib import redirect_stdout
+
+from . import charts, services
+
+# jenis job → (label, nama fungsi di services)
+EXPORTS = {
+    "ringkasan": ("Ringkasan status", "report_export_to_csv"),
+    "top_penulis": ("Top-{0} Penulis", "export_top_authors"),
+    "top_penerbit": ("Top-{0} Penerbit", "export_top_publishers"),
+    "top_judul": ("Top-{0} Judul", "export_top_titles"),
+    "statistik": ("Statistik {0}", "export_stats"),
+    "semua": ("Semua report (Top-{0})", "export_all_reports"),
+}
+PENDING = ("antri", "berjalan")
+CONFIG_KEYS = ("DATA_DIR", "DATA_FILE", "SHARD_DIR", "EXPORT_DIR")
+
+
+def _config() -> dict:
+    cfg = {k: getattr(services, k) for k in CONFIG_KEYS}
+    cfg["CHART_BACKEND"] = charts.BACKEND
+    return cfg
+
+def _apply_config(cfg: dict) -> None:
+    for k in CONFIG_KEYS:
+        setattr(services, k, cfg[k])
+    charts.BACKEND = cfg["CHART_BACKEND"]
+
+def _worker(tasks, events) -> None:
+    """Loop proses worker: ambil job → jalankan → kirim event status. `None` = berhenti."""
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        job_id, kind, args, cfg = item
+        _apply_config(cfg)
+        events.put((job_id, "berjalan", time.time(), {}))
+        buf = io.StringIO()
+        try:
+            with redirect_stdout(buf):
+                res = getattr(services, EXPORTS[kind][1])(*args)
+            paths = [res] if isinstance(res, str) else list(res or [])
+            log = buf.getvalue().strip()
+            if paths:
+                events.put((job_id, "selesai", time.time(), {"paths": paths, "log": log}))
+            else:
+                events.put((job_id, "gagal", time.time(),
+                            {"error": log or "Tidak ada file yang dihasilkan.", "log": log}))
+        except Exception as e:  # job gagal tidak boleh mematikan worker
+            events.put((job_id, "gagal", time.time(),
+                        {"error": f"{type(e).__name__}: {e}", "log": buf.getvalue().strip()}))
+
+
+class JobQueue:
+    """Antrian job export milik satu sesi CLI + status tiap job."""
+
+    def __init__(self):
+        self.jobs: dict[int, dict] = {}
+        self._next_id = 1
+        self._proc = None
+        self._tasks = None
+        self._events = None
+        self._atexit = False
+
+    # ---------- Worker ----------
+    def _ensure_worker(self) -> None:
+        if self._proc is not None and self._proc.is_alive():
+            return
+        self._tasks, self._events = mp.Queue(), mp.Queue()
+        self._proc = mp.Process(target=_worker, args=(self._tasks, self._events),
+                                name="library-export-worker")
+        self._proc.start()
+        if not self._atexit:  # dijalankan sebelum multiprocessing men-join proses anak
+            atexit.register(self.shutdown, wait=False)
+            self._atexit = True
+
+    def poll(self) -> None:
+        """Tarik event status dari worker (non-blocking)."""
+        if self._events is None:
+            return
+        while True:
+            try:
+                job_id, status, ts, info = self._events.get_nowait()
+            except queue.Empty:
+                break
+            job = self.jobs[job_id]
+            job["status"] = status
+            if status == "berjalan":
+                job["started"] = ts
+            else:
+                job["finished"] = ts
+                job.update(info)
+        if self._proc is not None and not self._proc.is_alive():
+            for job in self.jobs.values():  # worker mati mendadak → job yang tertinggal gagal
+                if job["status"] in PENDING:
+                    job.update(status="gagal", finished=time.time(), error="Worker export berhenti.")
+            self._proc = None
+
+    # ---------- API ----------
+    def submit(self, kind: str, *args) -> tuple[int, bool]:
+        """Antrekan export `kind`. Return (job_id, baru?) — baru=False jika job identik masih pending."""
+        if kind not in EXPORTS:
+            raise ValueError(f"Jenis export tidak dikenal: {kind!r} (pilih: {', '.join(EXPORTS)})")
+        self.poll()
+        key = (kind, args, services._catalog_version())
+        for job in self.jobs.values():
+            if job["key"] == key and job["status"] in PENDING:
+                return job["id"], False
+        self._ensure_worker()
+        job_id = self._next_id
+        self._next_id += 1
+        self.jobs[job_id] = {"id": job_id, "kind": kind, "label": EXPORTS[kind][0].format(*args),
+                             "key": key, "status": "antri", "submitted": time.time(),
+                             "started": None, "finished": None, "paths": [], "error": None, "log": ""}
+        self._tasks.put((job_id, kind, args, _config()))
+        return job_id, True
+
+    def pending(self) -> int:
+        self.poll()
+        return sum(j["status"] in PENDING for j in self.jobs.values())
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Tunggu semua job selesai. Return False jika timeout."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if end is not None and time.monotonic() >= end:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def rows(self) -> list[dict]:
+        """Baris status untuk ditampilkan (urut ID)."""
+        self.poll()
+        now = time.time()
+        out = []
+        for j in self.jobs.values():
+            if j["status"] == "antri":
+                elapsed = now - j["submitted"]
+            else:
+                elapsed = (j["finished"] or now) - (j["started"] or j["submitted"])
+            failed = j["status"] == "gagal"
+            out.append({"job": j["id"], "export": j["label"], "status": j["status"],
+                        "durasi_dtk": round(elapsed, 1),
+                        "output": j["error"] if failed else "\n".join(j["paths"]),
+                        "pesan": "" if failed and j["error"] == j["log"] else j["log"]})
+        return out
+
+    def shutdown(self, wait: bool = True, timeout: float = 5) -> None:
+        """Hentikan worker: sentinel `None` lalu join; dipaksa berhenti jika lewat `timeout`."""
+        if self._proc is None:
+            return
+        if wait:
+            self.wait()
+        self._tasks.put(None)
+        self._proc.join(timeout=timeout)
+        if self._proc.is_alive():
+            self._proc.terminate()
+            self._proc.join()
+        self._proc = None
+
+
+# ---------- Antrian default (satu per proses CLI) ----------
+_QUEUE: JobQueue | None = None
+
+def get_queue() -> JobQueue:
+    global _QUEUE
+    if _QUEUE is None:
+        _QUEUE = JobQueue()
+    return _QUEUE
+
+def submit(kind: str, *args) -> tuple[int, bool]:
+    return get_queue().submit(kind, *args)
+
+def pending_count() -> int:
+    return _QUEUE.pending() if _QUEUE is not None else 0
+
+def job_rows() -> list[dict]:
+    return get_queue().rows() if _QUEUE is not None else []
+
+def shutdown(wait: bool = True) -> None:
+    """Dipanggil saat CLI keluar: job yang masih antri/berjalan diselesaikan dulu."""
+    if _QUEUE is not None:
+        _QUEUE.shutdown(wait=wait)
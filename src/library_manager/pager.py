@@ -0,0 +1,157 @@
+# src/library_manager/pager.py
+"""
+Tampilan tabel berhalaman (paged view) untuk katalog & hasil query besar.
+
+Kenapa tidak `tabulate(..., tablefmt="grid")` untuk semua?
+- tabulate harus mengukur SEMUA sel sebelum baris pertama tercetak,
+  lalu membangun satu string raksasa di memori.
+- Di depan meja sirkulasi, user hanya butuh satu halaman.
+
+Menyediakan:
+- `stream_table()`: renderer fixed-width; baris dicetak begitu dihasilkan (iterable/generator).
+- `page_slice()`: ambil potongan halaman dari cursor (offset) saja.
+- `browse()`: navigasi interaktif next/prev/lompat/urutkan (re-prompt & batal cepat 0).
+- `show_rows()`: hasil kecil tetap grid tabulate, hasil besar otomatis pakai `browse()`.
+"""
+
+from __future__ import annotations
+import sys
+from typing import Iterable, TextIO
+
+from tabulate import tabulate
+
+from .utils import ask_choice, ask_int_range, ask_yes_no
+
+PAGE_SIZE = 20       # baris per halaman (default)
+MAX_PAGE_SIZE = 500
+
+# (field, header, lebar kolom). Lebar tetap → tidak perlu mengukur seluruh data.
+COLUMNS: list[tuple[str, str, int]] = [
+    ("id", "id", 6),
+    ("judul", "judul", 32),
+    ("penulis", "penulis", 22),
+    ("penerbit", "penerbit", 20),
+    ("tahun", "tahun", 5),
+    ("dipinjam", "dipinjam", 8),
+    ("status", "status", 9),
+    ("tanggal_pinjam", "tgl_pinjam", 10),
+    ("tanggal_kembali", "tgl_kembali", 11),
+]
+NUMERIC_FIELDS = {"id", "tahun", "dipinjam"}
+
+# ---------- Renderer fixed-width ----------
+def _cell(value, width: int, numeric: bool) -> str:
+    s = "" if value is None else str(value)
+    if len(s) > width:
+        s = s[:width - 1] + "…"
+    return s.rjust(width) if numeric else s.ljust(width)
+
+def _format_row(row: dict, columns: list[tuple[str, str, int]]) -> str:
+    return " | ".join(_cell(row.get(f), w, f in NUMERIC_FIELDS) for f, _, w in columns)
+
+def stream_table(rows: Iterable[dict], columns: list[tuple[str, str, int]] | None = None,
+                 out: TextIO | None = None) -> int:
+    """
+    Cetak tabel fixed-width baris demi baris (streaming).
+    Teks yang lebih panjang dari kolom dipotong dengan '…'.
+    Return jumlah baris data yang dicetak.
+    """
+    columns = columns or COLUMNS
+    out = out or sys.stdout
+    out.write(" | ".join(_cell(h, w, False) for _, h, w in columns) + "\n")
+    out.write("-+-".join("-" * w for _, _, w in columns) + "\n")
+    n = 0
+    for r in rows:
+        out.write(_format_row(r, columns) + "\n")
+        n += 1
+    return n
+
+# ---------- Cursor & sort ----------
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+def page_slice(rows: list[dict], page: int, page_size: int) -> list[dict]:
+    """Potongan halaman ke-`page` (mulai 1); page di luar rentang di-clamp."""
+    page = min(max(1, page), page_count(len(rows), page_size))
+    start = (page - 1) * page_size
+    return rows[start:start + page_size]
+
+def sort_rows(rows: list[dict], field: str, desc: bool = False) -> list[dict]:
+    """Urutkan by kolom; None selalu di akhir, teks case-insensitive."""
+    numeric = field in NUMERIC_FIELDS
+
+    def key(b: dict):
+        v = b.get(field)
+        if numeric:
+            try:
+                return (0, int(v))
+            except (TypeError, ValueError):
+                return (1, 0)  # angka rusak dikumpulkan di ujung
+        return (0, str(v).lower())
+
+    present = [b for b in rows if b.get(field) is not None]
+    missing = [b for b in rows if b.get(field) is None]
+    present.sort(key=key, reverse=desc)
+    return present + missing
+
+# ---------- Navigasi interaktif ----------
+def _print_page(rows: list[dict], page: int, page_size: int, title: str, sort_desc: str) -> None:
+    pages = page_count(len(rows), page_size)
+    page = min(max(1, page), pages)
+    print(f"\n{title} — halaman {page}/{pages} ({len(rows)} baris{sort_desc})")
+    stream_table(page_slice(rows, page, page_size))
+
+def browse(rows: list[dict], title: str = "Daftar Buku", page_size: int = PAGE_SIZE) -> None:
+    """
+    Navigasi halaman:
+      n = halaman berikutnya, p = sebelumnya, g = lompat ke halaman,
+      s = urutkan kolom, u = ubah ukuran halaman, 0 = kembali.
+    Hanya potongan halaman yang dirender; sort dilakukan sekali per perubahan urutan.
+    """
+    view = rows
+    page = 1
+    sort_desc = ""
+    while True:
+        pages = page_count(len(view), page_size)
+        page = min(max(1, page), pages)
+        _print_page(view, page, page_size, title, sort_desc)
+        c = ask_choice({"n", "p", "g", "s", "u"},
+                       "Navigasi: n.Next p.Prev g.Lompat s.Urutkan u.Ukuran")
+        if c is None:
+            return
+        if c == "n":
+            if page >= pages: print("Sudah di halaman terakhir.")
+            page += 1
+        elif c == "p":
+            if page <= 1: print("Sudah di halaman pertama.")
+            page -= 1
+        elif c == "g":
+            target = ask_int_range("Ke halaman", 1, pages)
+            if target is not None:
+                page = target
+        elif c == "s":
+            opts = {str(i): f for i, (f, _, _) in enumerate(COLUMNS, start=1)}
+            print("Kolom: " + "  ".join(f"{i}.{h}" for i, (_, h, _) in enumerate(COLUMNS, start=1)))
+            k = ask_choice(set(opts), "Urutkan by kolom")
+            if k is None:
+                continue
+            desc = ask_yes_no("Urut menurun (besar → kecil)?")
+            if desc is None:
+                continue
+            view = sort_rows(rows, opts[k], desc)
+            sort_desc = f", urut {opts[k]} {'desc' if desc else 'asc'}"
+            page = 1
+        else:
+            size = ask_int_range("Baris per halaman", 1, MAX_PAGE_SIZE)
+            if size is not None:
+                # pertahankan posisi: baris pertama halaman sekarang tetap terlihat
+                first = (page - 1) * page_size
+                page_size = size
+                page = first // page_size + 1
+
+def show_rows(rows: list[dict], title: str = "Hasil", page_size: int = PAGE_SIZE) -> None:
+    """Hasil kecil → grid tabulate seperti biasa; hasil besar → paged view."""
+    if len(rows) <= page_size:
+        print(tabulate(rows, headers="keys", tablefmt="grid"))
+    else:
+        browse(rows, title, page_size)
@@ -0,0 +1,215 @@
+# src/library_manager/query.py
+"""
+Query gabungan (AND) dengan perencanaan berbasis index.
+
+Predikat yang didukung (semua opsional, digabung AND):
+- penulis / penerbit / judul / status = nilai (exact, case-insensitive; sama dengan filter exact)
+- tahun_min ≤ tahun ≤ tahun_max
+- keyword (contains pada judul/penulis/penerbit; sama dengan cari keyword)
++ sort (kolom, asc/desc) dan limit.
+
+Index (`CatalogIndex`, per versi snapshot; tiap index dibangun malas saat pertama dipakai):
+- hash index per kolom exact → daftar posisi buku,
+- index terurut untuk `tahun` (bisect untuk rentang),
+- index kata (token dipisah spasi) untuk keyword: potongan keyword tanpa spasi pasti berada
+  di dalam satu kata, jadi kandidat = gabungan posting kata yang memuatnya → lalu diverifikasi.
+
+Planner:
+- Hitung kardinalitas tiap predikat dari index (murah & exact untuk exact/rentang).
+- Mulai dari predikat PALING selektif, intersect set ID berikutnya selama set-nya kecil;
+  predikat yang jauh lebih lebar dicek langsung pada kandidat (residual) tanpa materialisasi.
+- Keyword (paling mahal diestimasi) cukup dicek residual jika predikat lain sudah
+  menyaring kandidat ke ≤ `KEYWORD_RESIDUAL_MAX` buku.
+"""
+
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from typing import Sequence
+
+from .pager import sort_rows
+
+EQ_FIELDS = ("penulis", "penerbit", "judul", "status")
+TEXT_FIELDS = ("judul", "penulis", "penerbit")
+INTERSECT_RATIO = 4  # intersect jika set predikat ≤ 4× kandidat; selain itu cek residual
+KEYWORD_RESIDUAL_MAX = 5_000
+
+
+class CatalogIndex:
+    """Index read-only di atas satu versi katalog (tuple/list buku)."""
+
+    def __init__(self, books: Sequence[dict]):
+        self.books = books
+        self._eq: dict[str, dict[str, list[int]]] = {}
+        self._year_keys: list[int] | None = None
+        self._year_pos: list[int] = []
+        self._words: dict[str, list[int]] | None = None
+
+    # --- pembangunan malas ---
+    def _eq_index(self, field: str) -> dict[str, list[int]]:
+        idx = self._eq.get(field)
+        if idx is None:
+            idx = self._eq[field] = {}
+            for i, b in enumerate(self.books):
+                idx.setdefault(str(b.get(field, "")).lower(), []).append(i)
+        return idx
+
+    def _years(self) -> list[int]:
+        if self._year_keys is None:
+            years = []
+            for i, b in enumerate(self.books):
+                try:
+                    years.append((int(b.get("tahun", 0)), i))
+                except (TypeError, ValueError):
+                    pass
+            years.sort()
+            self._year_keys = [y for y, _ in years]
+            self._year_pos = [i for _, i in years]
+        return self._year_keys
+
+    def _word_index(self) -> dict[str, list[int]]:
+        if self._words is None:
+            words: dict[str, list[int]] = {}
+            for i, b in enumerate(self.books):
+                seen = set()
+                for f in TEXT_FIELDS:
+                    for w in str(b.get(f, "")).lower().split():
+                        if w not in seen:
+                            seen.add(w)
+                            words.setdefault(w, []).append(i)
+            self._words = words
+        return self._words
+
+    # --- akses posting ---
+    def eq_postings(self, field: str, value) -> list[int]:
+        return self._eq_index(field).get(str(value).lower(), [])
+
+    def year_range(self, lo: int | None, hi: int | None) -> tuple[int, int]:
+        """Rentang indeks [a, b) di `year_positions` untuk lo ≤ tahun ≤ hi."""
+        keys = self._years()
+        a = 0 if lo is None else bisect_left(keys, lo)
+        b = len(keys) if hi is None else bisect_right(keys, hi)
+        return a, max(a, b)
+
+    def year_positions(self, a: int, b: int) -> list[int]:
+        self._years()
+        return self._year_pos[a:b]
+
+    def keyword_candidates(self, keyword: str) -> set[int]:
+        """Superset buku yang mungkin memuat `keyword` (diverifikasi belakangan)."""
+        out: set[int] | None = None
+        for piece in keyword.lower().split():
+            hits: set[int] = set()
+            for w, posting in self._word_index().items():
+                if piece in w:
+                    hits.update(posting)
+            out = hits if out is None else out & hits
+            if not out:
+                return set()
+        return out or set()
+
+
+# ---------- Predikat ----------
+def _matches_keyword(b: dict, kw: str) -> bool:
+    return any(kw in str(b.get(f, "")).lower() for f in TEXT_FIELDS)
+
+def _year_ok(b: dict, lo: int | None, hi: int | None) -> bool:
+    try:
+        y = int(b.get("tahun", 0))
+    except (TypeError, ValueError):
+        return False
+    return (lo is None or y >= lo) and (hi is None or y <= hi)
+
+def _predicates(index: CatalogIndex, criteria: dict) -> list[dict]:
+    """Daftar predikat aktif + estimasi kardinalitas + cara materialisasi/cek."""
+    preds = []
+    for f in EQ_FIELDS:
+        v = criteria.get(f)
+        if v is None or v == "":
+            continue
+        posting = index.eq_postings(f, v)
+        lv = str(v).lower()
+        preds.append({
+            "name": f"{f}={v}", "size": len(posting),
+            "ids": lambda p=posting: set(p),
+            "check": lambda b, f=f, lv=lv: str(b.get(f, "")).lower() == lv,
+        })
+    lo, hi = criteria.get("tahun_min"), criteria.get("tahun_max")
+    if lo is not None or hi is not None:
+        a, z = index.year_range(lo, hi)
+        preds.append({
+            "name": f"tahun∈[{'' if lo is None else lo}, {'' if hi is None else hi}]", "size": z - a,
+            "ids": lambda a=a, z=z: set(index.year_positions(a, z)),
+            "check": lambda b, lo=lo, hi=hi: _year_ok(b, lo, hi),
+        })
+    kw = (criteria.get("keyword") or "").strip().lower()
+    if kw:
+        check = lambda b, kw=kw: _matches_keyword(b, kw)
+        if preds and min(p["size"] for p in preds) <= KEYWORD_RESIDUAL_MAX:
+            # kandidat sudah kecil → cek langsung, tidak perlu menyentuh index kata
+            preds.append({"name": f"keyword~{kw}", "size": float("inf"), "exact": False,
+                          "ids": None, "check": check})
+        else:
+            cand = index.keyword_candidates(kw)
+            preds.append({"name": f"keyword~{kw}", "size": len(cand), "exact": False,
+                          "ids": lambda c=cand: set(c), "check": check})
+    return preds
+
+# ---------- Planner & eksekusi ----------
+def plan(index: CatalogIndex, **criteria) -> list[str]:
+    """Urutan langkah yang akan dipakai (untuk ditampilkan ke user)."""
+    preds = sorted(_predicates(index, criteria), key=lambda p: p["size"])
+    if not preds:
+        return [f"scan semua ({len(index.books)})"]
+    steps = [f"index {preds[0]['name']} ({preds[0]['size']})"]
+    est = preds[0]["size"]
+    for p in preds[1:]:
+        if p["ids"] is not None and p["size"] <= est * INTERSECT_RATIO:
+            steps.append(f"∩ {p['name']} ({p['size']})")
+            est = min(est, p["size"])
+        else:
+            steps.append(f"cek {p['name']}")
+    return steps
+
+def run_query(index: CatalogIndex, sort: str | None = None, desc: bool = False,
+              limit: int | None = None, **criteria) -> list[dict]:
+    """
+    Jalankan query AND. Tanpa `sort`, hasil mengikuti urutan katalog.
+    `criteria`: penulis, penerbit, judul, status, tahun_min, tahun_max, keyword.
+    """
+    preds = sorted(_predicates(index, criteria), key=lambda p: p["size"])
+    books = index.books
+    if not preds:
+        rows = list(books)
+    else:
+        ids = preds[0]["ids"]()
+        residual = []
+        if preds[0].get("exact") is False:
+            residual.append(preds[0])
+        for p in preds[1:]:
+            if not ids:
+                break
+            if p["ids"] is not None and p["size"] <= len(ids) * INTERSECT_RATIO:
+                ids &= p["ids"]()
+                if p.get("exact") is False:
+                    residual.append(p)
+            else:
+                residual.append(p)
+        rows = [books[i] for i in sorted(ids)]
+        for p in residual:
+            rows = [b for b in rows if p["check"](b)]
+    if sort:
+        rows = sort_rows(rows, sort, desc)
+    if limit is not None and limit > 0:
+        rows = rows[:limit]
+    return rows
+
+
+# ---------- Cache index per versi ----------
+_CACHE: dict = {"version": None, "index": None}
+
+def index_for(books: Sequence[dict], version) -> CatalogIndex:
+    """Index untuk versi katalog `version`; dibangun ulang hanya jika versi berubah."""
+    if _CACHE["index"] is None or _CACHE["version"] != version:
+        _CACHE["index"] = CatalogIndex(books)
+        _CACHE["version"] = version
+    return _CACHE["index"]
@@ -0,0 +1,277 @@
+# src/library_manager/scan.py
+"""
+Mode scan barcode untuk sirkulasi cepat (jam sibuk).
+
+Berbeda dengan `borrow_book()`/`return_book()` (prompt ID → pratinjau → y/n → simpan):
+- ID buku dibaca beruntun dari stdin/file (satu ID per baris, hasil scanner barcode).
+- Aturan status SAMA dengan menu (lihat `borrow_error`/`return_error` di services.py).
+- Satu baris output per scan: ✓ berhasil / ✗ alasan gagal.
+- Group commit: perubahan disimpan setiap `batch` scan berhasil ATAU setiap `interval_ms`
+  milidetik (mana yang lebih dulu, juga saat scanner diam), dan selalu di akhir sesi —
+  termasuk saat EOF atau Ctrl-C → tidak ada tulis ulang per item, tidak ada scan ✓ yang hilang.
+
+Sumber input:
+- `run_scan_stream(lines)` : file/pipe/list (mode `library-cli scan`); thread pembaca terpisah
+  agar commit berbasis waktu tetap jalan, berhenti lewat sentinel dan di-join saat selesai.
+- `run_scan_prompt(stream)`: scan dari menu (keyboard/scanner di terminal); dibaca di thread
+  UTAMA dengan timeout (`select`, POSIX) → tidak ada thread yang tertinggal memblokir stdin
+  setelah kembali ke menu, dan baris `[commit]` berbasis waktu dicetak di antara dua baca,
+  bukan di tengah prompt.
+
+Saat commit, aturan status dicek ULANG terhadap versi terbaru tiap buku (`apply_books`):
+jika meja lain sudah meminjam/mengembalikan buku itu sejak sesi dibuka, scan tersebut
+dilaporkan sebagai baris ✗ konflik dan data meja lain tidak ditimpa.
+Buku yang berhasil di-commit tercatat di change feed (op borrow/return).
+"""
+
+from __future__ import annotations
+import io
+import os
+import queue
+import select
+import sys
+import threading
+import time
+from typing import Iterable, TextIO
+
+from .services import (
+    borrow_error, return_error, mark_borrowed, mark_returned, load_books, apply_books,
+    find_book_by_id,
+)
+
+MODES = {
+    "borrow": (borrow_error, mark_borrowed, "dipinjam"),
+    "return": (return_error, mark_returned, "dikembalikan"),
+}
+BATCH = 50          # commit setiap N scan berhasil
+INTERVAL_MS = 2000  # ... atau setiap T milidetik
+
+
+class ScanSession:
+    """State satu sesi scan: katalog di memori + perubahan yang belum di-commit."""
+
+    def __init__(self, mode: str, batch: int = BATCH, interval_ms: int = INTERVAL_MS,
+                 out: TextIO | None = None):
+        if mode not in MODES:
+            raise ValueError(f"Mode scan tidak dikenal: {mode!r} (pilih: {', '.join(MODES)})")
+        self.mode = mode
+        self.batch = max(1, batch)
+        self.interval = max(0, interval_ms) / 1000
+        self.out = out or sys.stdout
+        self.by_id = {b.get("id"): b for b in load_books()}
+        self.pending: dict = {}
+        self.since_commit = 0
+        self.last_commit = time.monotonic()
+        self.stats = {"scan": 0, "ok": 0, "gagal": 0, "commit": 0}
+
+    def _emit(self, line: str) -> None:
+        self.out.write(line + "\n")
+        self.out.flush()
+
+    def scan(self, raw: str) -> bool:
+        """Proses satu scan. Return True jika berhasil diterapkan."""
+        raw = raw.strip()
+        if not raw:
+            return False
+        self.stats["scan"] += 1
+        check, apply, verb = MODES[self.mode]
+        try:
+            bid = int(raw)
+        except ValueError:
+            self.stats["gagal"] += 1
+            self._emit(f"✗ {raw}: ID harus berupa angka.")
+            return False
+        book = self.by_id.get(bid)
+        err = check(book)
+        if err:
+            self.stats["gagal"] += 1
+            self._emit(f"✗ {bid}: {err}")
+            return False
+        apply(book)
+        self.pending[bid] = book
+        self.since_commit += 1
+        self.stats["ok"] += 1
+        due = f" (kembali {book['tanggal_kembali']})" if self.mode == "borrow" else ""
+        self._emit(f"✓ {bid} {verb}{due} — {book.get('judul')}")
+        if self.since_commit >= self.batch:
+            self.commit()
+        return True
+
+    def due(self) -> bool:
+        """Ada perubahan yang sudah melewati batas waktu commit?"""
+        return bool(self.pending) and time.monotonic() - self.last_commit >= self.interval
+
+    def seconds_until_due(self) -> float | None:
+        if not self.pending:
+            return None
+        return max(0.0, self.interval - (time.monotonic() - self.last_commit))
+
+    def _mutate(self, book: dict) -> str | None:
+        check, apply, _ = MODES[self.mode]
+        err = check(book)
+        if err:
+            return err
+        apply(book)
+        return None
+
+    def commit(self) -> int:
+        """
+        Simpan semua perubahan tertunda dalam SATU tulis, dicek ulang terhadap data terbaru.
+        Return jumlah buku disimpan.
+        """
+        self.last_commit = time.monotonic()
+        if not self.pending:
+            return 0
+        written, conflicts = apply_books(list(self.pending), self._mutate, op=self.mode)
+        self.pending.clear()
+        self.since_commit = 0
+        self.stats["commit"] += 1
+        for b in written:
+            self.by_id[b.get("id")] = b
+        for bid, err in conflicts.items():
+            self.stats["ok"] -= 1
+            self.stats["gagal"] += 1
+            latest = find_book_by_id(bid)
+            if latest is None:
+                self.by_id.pop(bid, None)
+            else:
+                self.by_id[bid] = latest
+            self._emit(f"✗ {bid}: konflik saat commit (diubah meja lain) — {err}")
+        self._emit(f"[commit] {len(written)} buku disimpan.")
+        return len(written)
+
+    def close(self) -> dict:
+        self.commit()
+        return self.stats
+
+
+def _feed(session: ScanSession, line: str) -> None:
+    session.scan(line)
+    if session.due():
+        session.commit()
+
+def run_scan_stream(lines: Iterable[str], session: ScanSession) -> dict:
+    """
+    Proses aliran scan sampai habis (EOF). Pembacaan dilakukan di thread terpisah
+    agar commit berbasis waktu tetap jalan walau scanner sedang diam.
+    Reader menunggu tiap scan selesai diproses sebelum membaca berikutnya, dan berhenti
+    (lalu di-join) begitu sesi selesai. Perubahan tertunda selalu di-commit saat keluar,
+    termasuk karena Ctrl-C/exception.
+    """
+    q: queue.Queue = queue.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def reader() -> None:
+        try:
+            for line in lines:
+                q.put(line)
+                q.join()
+                if stop.is_set():
+                    break
+        finally:
+            q.put(done)
+
+    t = threading.Thread(target=reader, name="scan-reader", daemon=True)
+    t.start()
+    try:
+        while True:
+            try:
+                item = q.get(timeout=session.seconds_until_due())
+            except queue.Empty:
+                session.commit()
+                continue
+            if item is done:
+                break
+            try:
+                _feed(session, item)
+            except BaseException:
+                stop.set()  # sebelum task_done → reader berhenti, tidak membaca baris lagi
+                raise
+            finally:
+                q.task_done()
+    finally:
+        stop.set()
+        session.close()
+    t.join()
+    return session.stats
+
+
+class LineReader:
+    """
+    Baca baris dari terminal di thread pemanggil, dengan timeout (`select` pada fd; POSIX + tty).
+    Selain itu (pipe, StringIO, Windows) `readline` biasa yang memblokir — commit berbasis
+    waktu lalu terjadi saat scan berikutnya datang.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        try:
+            self.fd = stream.fileno() if os.name == "posix" and stream.isatty() else None
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            self.fd = None
+        self._buf = b""
+
+    def readline(self, timeout: float | None = None) -> str | None:
+        """Satu baris (tanpa newline); None jika `timeout` detik lewat. EOFError saat EOF."""
+        if self.fd is None:
+            line = self.stream.readline()
+            if not line:
+                raise EOFError
+            return line.rstrip("\r\n")
+        while b"\n" not in self._buf:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                return None
+            chunk = os.read(self.fd, 4096)
+            if not chunk:
+                if not self._buf:
+                    raise EOFError
+                self._buf += b"\n"
+                break
+            self._buf += chunk
+        line, self._buf = self._buf.split(b"\n", 1)
+        return line.decode("utf-8", "replace").rstrip("\r")
+
+
+def run_scan_prompt(session: ScanSession, stream: TextIO | None = None,
+                    prompt: str = "scan> ", stop: str = "0") -> dict:
+    """
+    Scan interaktif dari menu: prompt → baca (thread utama, timeout = sisa waktu commit) → proses.
+    Output commit berbasis waktu yang terjadi saat menunggu ditampung lalu dicetak setelah baris
+    berikutnya masuk. Selesai pada baris `stop` atau EOF; perubahan tertunda selalu di-commit.
+    """
+    reader = LineReader(stream or sys.stdin)
+    out, held = session.out, io.StringIO()
+
+    def flush_held() -> None:
+        if held.tell():
+            out.write(held.getvalue()); out.flush()
+            held.seek(0); held.truncate()
+
+    try:
+        while True:
+            out.write(prompt); out.flush()
+            while True:
+                try:
+                    line = reader.readline(session.seconds_until_due())
+                except EOFError:
+                    return session.stats
+                if line is not None:
+                    break
+                session.out = held
+                try:
+                    session.commit()
+                finally:
+                    session.out = out
+            flush_held()
+            if line.strip() == stop:
+                break
+            _feed(session, line)
+    except KeyboardInterrupt:
+        out.write("\n")
+        raise
+    finally:
+        flush_held()
+        session.close()
+    return session.stats
@@ -8,6 +8,7 @@ Menyediakan:
 - Mutasi: tambah/update/hapus, pinjam/kembalikan (status + counter `dipinjam`).
 - Report ringkas (katalog saat ini) + export CSV.
 - Analytics Top-N (penulis/penerbit/judul) + export CSV/XLSX + chart.
+- Change feed: tiap mutasi dapat seq monoton (changes.py) + export inkremental.
 
 Catatan arsitektur:
 - Sumber data: data/books.json (tetap)  → kompatibel dengan data kamu sekarang.  # noqa
@@ -22,17 +23,16 @@ from __future__ import annotations
 import csv
 import json
 import os
-from collections import defaultdict
+import sys
 from datetime import datetime, timedelta
-from typing import Sequence
-
-# Matplotlib diset non-GUI (menyimpan ke file)
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from typing import Iterable, TextIO
 
 from tabulate import tabulate
 
+from . import changes, charts, shards
+from .analytics import ALL_FIELDS, aggregate_books, status_summary, top_rows
+from .query import index_for, plan, run_query
+from .snapshot import CatalogSnapshot, SnapshotStore, write_json_atomic
 from .utils import (  # helper input/validator buatanmu
     ask_choice, ask_int, ask_int_range, ask_str, ask_yes_no,
     validate_year, current_year, MIN_YEAR,
@@ -44,6 +44,9 @@ from .utils import (  # helper input/validator buatanmu
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 DATA_FILE = os.path.join(DATA_DIR, "books.json")       # sumber data (tetap)  :contentReference[oaicite:3]{index=3}
+SHARD_DIR = os.path.join(DATA_DIR, "shards")            # aktif jika ada shards/manifest.json
+CHANGES_FILE = os.path.join(DATA_DIR, "changes.jsonl")  # change feed (append-only)
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "changes_checkpoint.json")
 EXPORT_DIR = os.path.join(BASE_DIR, "outputs")          # artefak/report (baru)
 
 DATE_FMT = "%Y-%m-%d"
@@ -74,13 +77,13 @@ def _export_rows_to_csv(rows: list[dict], path: str) -> None:
         for r in rows:
             w.writerow(r)
 
-def _export_rows_to_xlsx(rows: list[dict], path: str, sheet: str) -> None:
-    """Export sederhana ke .xlsx (opsional; butuh openpyxl)."""
+def _export_rows_to_xlsx(rows: list[dict], path: str, sheet: str) -> str | None:
+    """Export sederhana ke .xlsx (opsional; butuh openpyxl). Return path, atau None jika dilewati."""
     try:
         from openpyxl import Workbook  # import lokal supaya dependency opsional
     except ImportError:
         print("Info: 'openpyxl' belum terpasang → lewati export .xlsx.")
-        return
+        return None
     _ensure_dir(os.path.dirname(path))
     wb = Workbook()
     ws = wb.active
@@ -91,59 +94,229 @@ def _export_rows_to_xlsx(rows: list[dict], path: str, sheet: str) -> None:
         for r in rows:
             ws.append([r.get(h) for h in headers])
     wb.save(path)
-
-def _palette(n: int) -> Sequence:
-    """Palet warna (tab20), siklik jika n>20."""
-    cmap = plt.get_cmap("tab20")
-    return [cmap(i % 20) for i in range(n)]
+    return path
 
 def _save_bar(labels: list[str], values: list[int], title: str, fname: str,
               xlabel: str = "", ylabel: str = "Jumlah") -> str:
     """
-    Simpan bar chart berwarna + label angka.
-    Menggunakan palet tab20 agar kontras dan konsisten.
+    Simpan bar chart berwarna + label angka (palet tab20) ke EXPORT_DIR.
+    Format mengikuti backend chart (lihat charts.py): PNG via matplotlib atau SVG bawaan;
+    ekstensi `fname` disesuaikan. Return path file.
     """
     _ensure_dir(EXPORT_DIR)
-    plt.figure(figsize=(10, 6))
-    colors = _palette(len(labels))
-    bars = plt.bar(labels, values, color=colors, edgecolor="black", linewidth=0.5)
-    plt.title(title)
-    if xlabel: plt.xlabel(xlabel)
-    if ylabel: plt.ylabel(ylabel)
-    plt.xticks(rotation=20, ha="right")
-    # label angka di atas batang
-    for b in bars:
-        h = b.get_height()
-        plt.text(b.get_x() + b.get_width()/2, h, f"{int(h)}", ha="center", va="bottom", fontsize=9)
-    plt.tight_layout()
-    path = os.path.join(EXPORT_DIR, fname)
-    plt.savefig(path, dpi=150)
-    plt.close()
-    return path
+    stem = os.path.splitext(fname)[0]
+    return charts.save_bar(labels, values, title, EXPORT_DIR, stem, xlabel=xlabel, ylabel=ylabel)
 
 # ---------- IO rendah ----------
-def load_books() -> list[dict]:
-    """Baca seluruh buku dari JSON; aman jika file belum ada/korup."""
+def _stat_version(st: os.stat_result) -> tuple:
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _router() -> shards.ShardRouter | None:
+    """Router shard jika katalog sudah di-shard (lihat shards.py), selain itu None (satu file)."""
+    return shards.open_router(SHARD_DIR)
+
+def _catalog_version() -> tuple | None:
+    """Penanda versi katalog (berubah setiap kali file/shard ditulis ulang)."""
+    router = _router()
+    if router is not None:
+        return router.version()
+    try:
+        return _stat_version(os.stat(DATA_FILE))
+    except FileNotFoundError:
+        return None
+
+def _read_catalog(copy: bool = True) -> tuple[tuple | None, list[dict]]:
+    """
+    (versi, buku) dari SATU file handle → versi & isi selalu berpasangan.
+    Mode shard: gabungan semua shard (versi dicek sebelum & sesudah baca).
+    """
+    router = _router()
+    if router is not None:
+        return router.load_all(copy=copy)
     try:
         with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            version = _stat_version(os.fstat(f.fileno()))
+            return version, json.load(f)
     except FileNotFoundError:
-        return []
+        return None, []
     except json.JSONDecodeError:
         print("Peringatan: data/books.json tidak valid.")
-        return []
+        return None, []
+
+def load_books() -> list[dict]:
+    """Baca seluruh buku dari JSON (salinan mutable); aman jika file belum ada/korup."""
+    return _read_catalog()[1]
 
 def save_books(books: list[dict]) -> None:
-    """Tulis seluruh buku ke JSON (indent 2, UTF-8)."""
-    _ensure_dir(DATA_DIR)
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(books, f, indent=2, ensure_ascii=False)
+    """
+    Tulis seluruh buku ke JSON (indent 2, UTF-8).
+    Ditulis ke file sementara lalu `os.replace` (atomik): pembaca tidak pernah
+    melihat file setengah jadi, dan snapshot yang sedang dipegang tetap utuh.
+    Mode shard: hanya shard yang isinya berubah yang ditulis.
+    """
+    router = _router()
+    if router is not None:
+        router.save_all(books); return
+    write_json_atomic(DATA_FILE, books)
+
+def commit_books(changed: Iterable[dict], op: str | None = None) -> int:
+    """
+    Timpa record yang berubah (by id) ke katalog TERBARU dalam satu tulis.
+    Mode shard: hanya shard milik buku-buku tersebut yang dibaca & ditulis.
+    `op` (update/borrow/return) → record yang BENAR-BENAR ditulis dicatat ke change feed
+    (buku yang sudah dihapus meja lain dilewati dan tidak dicatat).
+    Return jumlah record yang ditulis.
+    """
+    upd = {c.get("id"): c for c in changed}
+    written, _ = apply_books(list(upd), lambda b: b.update(upd[b.get("id")]), op=op)
+    return len(written)
+
+def apply_books(ids: Iterable[int], mutate, op: str | None = None) -> tuple[list[dict], dict]:
+    """
+    Read-modify-write pada versi TERBARU buku-buku `ids` dalam satu tulis.
+    `mutate(book)` mengubah buku di tempat lalu return None, atau return alasan gagal
+    (mis. `borrow_error`) → buku itu tidak ditulis. Dipakai agar aturan status dicek ulang
+    terhadap data terbaru, bukan salinan lama milik caller.
+    `op` → buku yang benar-benar ditulis dicatat ke change feed.
+    Return (buku yang ditulis, {id: alasan gagal}).
+    """
+    ids = list(dict.fromkeys(ids))
+    with write_lock():
+        router = _router()
+        if router is not None:
+            written, errors = router.apply_many(ids, mutate)
+        else:
+            bs = load_books()
+            pos = {b.get("id"): b for b in bs}
+            written, errors = [], {}
+            for i in ids:
+                b = pos.get(i)
+                err = "ID tidak ditemukan." if b is None else mutate(b)
+                if err:
+                    errors[i] = err
+                else:
+                    written.append(b)
+            if written:
+                save_books(bs)
+        if op and written:
+            record_changes(op, written)
+    return written, errors
+
+def insert_book(book: dict) -> str | None:
+    """
+    Tambah satu buku ke katalog TERBARU dan catat ke change feed (op add).
+    Mode shard: hanya shard tujuan yang dibaca & ditulis.
+    Return alasan gagal (mis. ID sudah dipakai meja lain) atau None.
+    """
+    with write_lock():
+        router = _router()
+        if router is not None:
+            err = router.insert(book)
+        else:
+            books = load_books()
+            err = "ID sudah dipakai." if any(b.get("id") == book.get("id") for b in books) else None
+            if err is None:
+                save_books(books + [book])
+        if err is None:
+            record_changes("add", [book])
+    return err
+
+def remove_book(book_id: int, check=None) -> tuple[dict | None, str | None]:
+    """
+    Hapus satu buku dari katalog TERBARU dan catat ke change feed (op delete).
+    `check(book)` → alasan menolak, dicek pada data terbaru (mis. baru saja dipinjam).
+    Mode shard: hanya shard milik buku yang dibaca & ditulis.
+    Return (buku yang dihapus, None) atau (None, alasan gagal).
+    """
+    with write_lock():
+        router = _router()
+        if router is not None:
+            book, err = router.remove(book_id, check)
+        else:
+            books = load_books()
+            book = next((b for b in books if b.get("id") == book_id), None)
+            err = "ID tidak ditemukan." if book is None else (check(book) if check else None)
+            if err:
+                book = None
+            else:
+                save_books([b for b in books if b.get("id") != book_id])
+        if book is not None:
+            record_changes("delete", [book])
+    return book, err
+
+# ---------- Change feed (lihat changes.py) ----------
+def write_lock():
+    """
+    `with write_lock():` → satu penulis katalog pada satu waktu (antar proses).
+    Tulis katalog + catat ke feed dilakukan di dalam kunci yang sama → urutan seq = urutan commit.
+    """
+    return changes.locked(CHANGES_FILE)
+
+def record_changes(op: str, books: Iterable[dict]) -> list[int]:
+    """Catat mutasi ke change feed. Return seq yang diberikan."""
+    return changes.append(CHANGES_FILE, op, books)
+
+def export_changes(since: int | None = None, fmt: str = "csv", out: TextIO | None = None,
+                   checkpoint: str = changes.DEFAULT_CHECKPOINT, events: bool = False) -> tuple[int, int, int]:
+    """
+    Export record yang berubah setelah seq `since` (default: checkpoint `checkpoint`)
+    ke `out` (default stdout) sebagai CSV/JSONL, lalu simpan checkpoint baru.
+    Default satu baris per buku (perubahan terakhir); `events=True` → semua event.
+    Return (since, checkpoint_baru, jumlah_baris).
+    """
+    if since is None:
+        since = changes.load_checkpoint(CHECKPOINT_FILE, checkpoint)
+    feed = changes.read_since(CHANGES_FILE, since)
+    if not events:
+        feed = changes.compact(feed)
+    n, last = changes.write_feed(feed, out or sys.stdout, fmt)
+    # tanpa baris baru: jangan melompati seq yang belum ada (mis. --since 999 pada feed s/d 10)
+    new = last if n else min(since, changes.last_seq(CHANGES_FILE))
+    changes.save_checkpoint(CHECKPOINT_FILE, checkpoint, new)
+    return since, new, n
+
+# ---------- Shard (lihat shards.py) ----------
+def shard_split(by: str = "range", size: int = shards.RANGE_SIZE,
+                field: str = shards.BRANCH_FIELD) -> list[dict] | None:
+    """
+    Pecah katalog satu file ke shard di SHARD_DIR. books.json dibiarkan sebagai cadangan
+    (tidak dibaca selama mode shard aktif). Return status per shard, atau None jika
+    katalog sudah di-shard (tidak ada yang diubah).
+    """
+    if _router() is not None:
+        print("Katalog sudah di-shard. Gabungkan dulu (shard join) untuk mengganti strategi.")
+        return None
+    router = shards.split_catalog(load_books(), SHARD_DIR, by=by, range_size=size, field=field)
+    return router.status()
+
+def shard_status() -> list[dict]:
+    router = _router()
+    return router.status() if router is not None else []
+
+def shard_join() -> int:
+    """Gabung semua shard kembali ke DATA_FILE (mode satu file). Return jumlah buku."""
+    if _router() is None:
+        return 0
+    return len(shards.join_catalog(SHARD_DIR, DATA_FILE))
+
+# ---------- Snapshot baca (MVCC) ----------
+_SNAPSHOTS = SnapshotStore(_catalog_version, lambda: _read_catalog(copy=False))
+
+def read_snapshot():
+    """
+    `with read_snapshot() as snap:` → satu versi katalog immutable untuk report panjang.
+    Penulis tetap bisa menyimpan; versi lama dilepas setelah semua pembaca selesai.
+    """
+    return _SNAPSHOTS.read()
 
 # ---------- Query ----------
 def get_all_books() -> list[dict]:
     return load_books()
 
 def find_book_by_id(book_id: int) -> dict | None:
+    router = _router()
+    if router is not None:
+        return router.get(book_id)  # satu shard saja
     for b in load_books():
         if b.get("id") == book_id:
             return b
@@ -151,6 +324,15 @@ def find_book_by_id(book_id: int) -> dict | None:
 
 def filter_books_by_field(field: str, value) -> list[dict]:
     """Exact match by field; `tahun` dibandingkan numerik, lainnya case-insensitive."""
+    router = _router()
+    if router is not None:  # fan-out ke index tiap shard
+        if field == "tahun":
+            try:
+                v = int(value)
+            except ValueError:
+                return []
+            return router.query(tahun_min=v, tahun_max=v)[0]
+        return router.query(**{field: value})[0]
     books = load_books()
     if field == "tahun":
         try:
@@ -166,6 +348,9 @@ def search_books_keyword(keyword: str) -> list[dict]:
     kw = keyword.strip().lower()
     if not kw:
         return []
+    router = _router()
+    if router is not None:
+        return router.query(keyword=kw)[0]
     fields = ("judul", "penulis", "penerbit")
     out = []
     for b in load_books():
@@ -173,16 +358,27 @@ def search_books_keyword(keyword: str) -> list[dict]:
             out.append(b)
     return out
 
+def query_books(sort: str | None = None, desc: bool = False, limit: int | None = None,
+                **criteria) -> tuple[list[dict], list[str]]:
+    """
+    Query gabungan (AND) via index per versi snapshot (lihat query.py).
+    Return (hasil, rencana eksekusi). Mode shard: fan-out ke index per shard.
+    """
+    router = _router()
+    if router is not None:
+        return router.query(sort=sort, desc=desc, limit=limit, **criteria)
+    with read_snapshot() as snap:
+        index = index_for(snap.books, snap.version)
+        return run_query(index, sort=sort, desc=desc, limit=limit, **criteria), plan(index, **criteria)
+
 # ---------- Mutasi (dengan re-prompt & batal cepat) ----------
 def add_book() -> None:
-    books = load_books()
-
-    # ID unik
+    # ID unik (mode shard: cek ke satu shard saja, bukan baca seluruh katalog)
     while True:
         new_id = ask_int("Masukkan ID Buku", allow_zero_cancel=True)
         if new_id is None:
             print("Dibatalkan."); return
-        if any(b.get("id") == new_id for b in books):
+        if find_book_by_id(new_id) is not None:
             print("ID sudah dipakai. Gunakan ID lain."); continue
         break
 
@@ -192,6 +388,8 @@ def add_book() -> None:
     if penulis is None: print("Dibatalkan."); return
     penerbit = ask_str("Penerbit")
     if penerbit is None: print("Dibatalkan."); return
+    cabang = ask_str(f"Cabang (kosongkan = '{shards.DEFAULT_BRANCH}')", allow_empty=True)
+    if cabang is None: print("Dibatalkan."); return
 
     # validasi tahun domain
     while True:
@@ -207,6 +405,7 @@ def add_book() -> None:
         "penulis": penulis,
         "penerbit": penerbit,
         "tahun": tahun,
+        "cabang": cabang or shards.DEFAULT_BRANCH,  # kunci shard untuk `shard split --by branch`
         "dipinjam": 0,
         "status": "available",
         "tanggal_pinjam": None,
@@ -219,13 +418,12 @@ def add_book() -> None:
     if yn is None or yn is False:
         print("Batal simpan."); return
 
-    books.append(new_book)
-    save_books(books)
+    err = insert_book(new_book)  # dicek ulang: meja lain bisa memakai ID ini selama pengisian form
+    if err:
+        print(f"Buku tidak disimpan: {err}"); return
     print("Buku berhasil ditambahkan.")
 
 def update_book() -> None:
-    books = load_books()
-
     # cari id (re-prompt)
     book = None
     while True:
@@ -239,10 +437,10 @@ def update_book() -> None:
     print(tabulate([book], headers="keys", tablefmt="grid"))
 
     # pilih field
-    field_map = {"1": "judul", "2": "penulis", "3": "penerbit", "4": "tahun"}
+    field_map = {"1": "judul", "2": "penulis", "3": "penerbit", "4": "tahun", "5": "cabang"}
     while True:
-        print("\nField: 1.Judul  2.Penulis  3.Penerbit  4.Tahun  0.Batal")
-        ch = ask_choice({"1", "2", "3", "4"})
+        print("\nField: 1.Judul  2.Penulis  3.Penerbit  4.Tahun  5.Cabang  0.Batal")
+        ch = ask_choice(set(field_map))
         if ch is None: print("Dibatalkan."); return
         field = field_map.get(ch)
         if field: break
@@ -266,15 +464,10 @@ def update_book() -> None:
     if yn is None or yn is False:
         print("Batal update."); return
 
-    for b in books:
-        if b.get("id") == book["id"]:
-            b[field] = new_val; break
-    save_books(books)
+    commit_books([preview], op="update")
     print("Buku berhasil diperbarui.")
 
 def delete_book() -> None:
-    books = load_books()
-
     # cari id (re-prompt)
     book = None
     while True:
@@ -293,13 +486,45 @@ def delete_book() -> None:
     if yn is None or yn is False:
         print("Batal hapus."); return
 
-    books = [b for b in books if b.get("id") != book["id"]]
-    save_books(books)
+    # dicek ulang pada data terbaru: meja lain bisa menghapus/meminjam selama konfirmasi
+    _, err = remove_book(book["id"], lambda b: "Buku baru saja dipinjam. Kembalikan dulu sebelum dihapus."
+                         if b.get("status") == "borrowed" else None)
+    if err:
+        print(f"Buku tidak dihapus: {err}"); return
     print(f"ID {book['id']} terhapus.")
 
-def borrow_book() -> None:
-    books = load_books()
+# ---------- Aturan status peminjaman (dipakai menu & mode scan) ----------
+def borrow_error(book: dict | None) -> str | None:
+    """Alasan buku TIDAK bisa dipinjam (None jika boleh)."""
+    if not book:
+        return "ID tidak ditemukan."
+    if book.get("status") != "available":
+        return "Buku tidak tersedia (status bukan 'available')."
+    return None
 
+def return_error(book: dict | None) -> str | None:
+    """Alasan buku TIDAK bisa dikembalikan (None jika boleh)."""
+    if not book:
+        return "ID tidak ditemukan."
+    if book.get("status") != "borrowed":
+        return "Buku ini tidak berstatus 'borrowed'."
+    return None
+
+def mark_borrowed(book: dict) -> None:
+    """Set status borrowed + tanggal pinjam/kembali (BORROW_DAYS) + counter `dipinjam`."""
+    today = datetime.today().date()
+    book["status"] = "borrowed"
+    book["tanggal_pinjam"] = today.strftime(DATE_FMT)
+    book["tanggal_kembali"] = (today + timedelta(days=BORROW_DAYS)).strftime(DATE_FMT)
+    book["dipinjam"] = int(book.get("dipinjam", 0)) + 1
+
+def mark_returned(book: dict) -> None:
+    """Reset status ke available + kosongkan tanggal."""
+    book["status"] = "available"
+    book["tanggal_pinjam"] = None
+    book["tanggal_kembali"] = None
+
+def borrow_book() -> None:
     # pilih id yang available
     book = None
     while True:
@@ -308,8 +533,9 @@ def borrow_book() -> None:
         book = find_book_by_id(bid)
         if not book:
             print("ID tidak ditemukan. Coba lagi atau 0 untuk batal."); continue
-        if book.get("status") != "available":
-            print("Buku tidak tersedia (status bukan 'available')."); continue
+        err = borrow_error(book)
+        if err:
+            print(err); continue
         break
 
     print("\nAkan dipinjam:")
@@ -318,22 +544,13 @@ def borrow_book() -> None:
     if yn is None or yn is False:
         print("Batal pinjam."); return
 
-    today = datetime.today().date()
-    book["status"] = "borrowed"
-    book["tanggal_pinjam"] = today.strftime(DATE_FMT)
-    book["tanggal_kembali"] = (today + timedelta(days=BORROW_DAYS)).strftime(DATE_FMT)
-    book["dipinjam"] = int(book.get("dipinjam", 0)) + 1
-
-    bs = load_books()
-    for b in bs:
-        if b.get("id") == book["id"]:
-            b.update(book); break
-    save_books(bs)
-    print(f"Berhasil dipinjam. Deadline {book['tanggal_kembali']}.")
+    # aturan status dicek ulang pada data terbaru (meja lain/mode scan bisa mendahului)
+    written, errors = apply_books([book["id"]], lambda b: borrow_error(b) or mark_borrowed(b), op="borrow")
+    if not written:
+        print(f"Gagal pinjam: {errors[book['id']]}"); return
+    print(f"Berhasil dipinjam. Deadline {written[0]['tanggal_kembali']}.")
 
 def return_book() -> None:
-    books = load_books()
-
     book = None
     while True:
         bid = ask_int("ID buku yang dikembalikan", allow_zero_cancel=True)
@@ -341,8 +558,9 @@ def return_book() -> None:
         book = find_book_by_id(bid)
         if not book:
             print("ID tidak ditemukan. Coba lagi atau 0 untuk batal."); continue
-        if book.get("status") != "borrowed":
-            print("Buku ini tidak berstatus 'borrowed'."); continue
+        err = return_error(book)
+        if err:
+            print(err); continue
         break
 
     print("\nAkan dikembalikan:")
@@ -351,21 +569,16 @@ def return_book() -> None:
     if yn is None or yn is False:
         print("Batal pengembalian."); return
 
-    book["status"] = "available"
-    book["tanggal_pinjam"] = None
-    book["tanggal_kembali"] = None
-
-    bs = load_books()
-    for b in bs:
-        if b.get("id") == book["id"]:
-            b.update(book); break
-    save_books(bs)
+    written, errors = apply_books([book["id"]], lambda b: return_error(b) or mark_returned(b), op="return")
+    if not written:
+        print(f"Gagal mengembalikan: {errors[book['id']]}"); return
     print("Pengembalian selesai.")
 
 # ---------- Report (katalog saat ini) ----------
 def report_summary() -> None:
     """Cetak ringkasan katalog saat ini ke terminal."""
-    books = load_books()
+    with read_snapshot() as snap:
+        books = snap.books
     total = len(books)
     borrowed_now = [b for b in books if b.get("status") == "borrowed"]
     borrowed = len(borrowed_now)
@@ -380,54 +593,61 @@ def report_summary() -> None:
         print("\nBuku yang sedang dipinjam:")
         print(tabulate(borrowed_now, headers="keys", tablefmt="grid"))
 
-def report_export_to_csv() -> None:
+def _write_status_report(agg: dict, t: str) -> list[str]:
+    """Tulis ringkasan + daftar sedang dipinjam (CSV) + chart status dari hasil agregasi."""
+    summary = [status_summary(agg)]
+    paths = [os.path.join(EXPORT_DIR, f"report_summary_{t}.csv"),
+             os.path.join(EXPORT_DIR, f"report_borrowed_{t}.csv")]
+    _export_rows_to_csv(summary, paths[0])
+    _export_rows_to_csv(agg["borrowed"], paths[1])
+    paths.append(_save_bar(["Available", "Borrowed"], [summary[0]["buku_tersedia"], summary[0]["buku_dipinjam"]],
+                           "Komposisi Status Katalog", f"chart_status_{t}.png", xlabel="Status"))
+    return paths
+
+def report_export_to_csv() -> list[str]:
     """
     Export ringkasan + daftar sedang dipinjam ke CSV
     dan chart komposisi status (berwarna + label angka).
+    Return daftar path file yang dibuat.
     """
-    books = load_books()
-    t = _nowstamp()
-    borrowed_now = [b for b in books if b.get("status") == "borrowed"]
-    summary = [{
-        "total_buku_aktif": len(books),
-        "buku_tersedia": len(books) - len(borrowed_now),
-        "buku_dipinjam": len(borrowed_now),
-    }]
-
-    _export_rows_to_csv(summary, os.path.join(EXPORT_DIR, f"report_summary_{t}.csv"))
-    _export_rows_to_csv(borrowed_now, os.path.join(EXPORT_DIR, f"report_borrowed_{t}.csv"))
-    _save_bar(["Available", "Borrowed"], [len(books)-len(borrowed_now), len(borrowed_now)],
-              "Komposisi Status Katalog", f"chart_status_{t}.png", xlabel="Status")
+    with read_snapshot() as snap:
+        agg = _aggregate(snap, fields=())
+    paths = _write_status_report(agg, _nowstamp())
     print("Report ringkasan telah diekspor ke folder 'outputs/'.")
+    return paths
 
 # ---------- Analytics Top-N ----------
-def _top_by(field: str, top_n: int) -> list[dict]:
+def _aggregate(snap: CatalogSnapshot, fields=ALL_FIELDS) -> dict:
+    """
+    Agregasi untuk snapshot `snap`. Mode shard: partial per shard (cache per versi shard,
+    paralel antar shard) dipakai jika versinya sama dengan snapshot; selain itu satu pass di memori.
+    """
+    router = _router()
+    if router is not None:
+        version, agg = router.aggregate(fields)
+        if version == snap.version:
+            return agg
+    return aggregate_books(snap.books, fields=fields)
+
+def _top_by(field: str, top_n: int, snap: CatalogSnapshot | None = None) -> list[dict]:
     """
     Agregasi katalog saat ini:
     - field: 'penulis' | 'penerbit' | 'judul'
     - metrik: total_dipinjam (sum dari field `dipinjam` di katalog).
+    Jika kolom NumPy untuk versi katalog ini sudah dibangun → Top-N tervektor;
+    selain itu agregasi satu pass (lihat analytics.py). Hasil identik.
+    `snap` opsional: pakai snapshot yang sudah di-pin caller (satu versi untuk banyak report).
     """
-    if field == "judul":
-        rows = [{"judul": b.get("judul"), "total_dipinjam": int(b.get("dipinjam", 0))}
-                for b in load_books()]
-        rows.sort(key=lambda r: (-r["total_dipinjam"], r["judul"].lower()))
-        return rows[:max(1, top_n)]
-
-    agg = defaultdict(int)
-    extra = defaultdict(int)  # jumlah judul per author/publisher
-    for b in load_books():
-        k = (b.get(field) or "").strip() or "(Tidak diketahui)"
-        agg[k] += int(b.get("dipinjam", 0))
-        if field in {"penulis", "penerbit"}:
-            extra[k] += 1
-    rows = []
-    for k, v in agg.items():
-        r = {field: k, "total_dipinjam": v}
-        if field in {"penulis", "penerbit"}:
-            r["jumlah_judul"] = extra[k]
-        rows.append(r)
-    rows.sort(key=lambda r: (-r["total_dipinjam"], -(r.get("jumlah_judul") or 0), str(r)))
-    return rows[:max(1, top_n)]
+    if snap is None:
+        with read_snapshot() as snap:
+            return _top_by(field, top_n, snap)
+    np_mod = _analytics_np(load=False)
+    if np_mod is not None and np_mod.HAS_NUMPY and field in ALL_FIELDS:
+        cols = np_mod.cached_columns(snap.version)
+        if cols is not None:
+            return np_mod.top_n(cols, field, top_n)
+    agg = _aggregate(snap, fields=(field,))
+    return top_rows(agg, field, top_n)
 
 def analytics_top_authors(n: int) -> None:
     rows = _top_by("penulis", n)
@@ -454,26 +674,128 @@ def analytics_top_titles(n: int) -> None:
               "Top Judul (Katalog)", f"chart_top_titles_{_nowstamp()}.png", xlabel="Judul")
 
 # ---------- Analytics Exporters (CSV+XLSX+Chart) ----------
-def export_top_authors(n: int) -> None:
-    rows = _top_by("penulis", n); t = _nowstamp()
-    _export_rows_to_csv(rows, os.path.join(EXPORT_DIR, f"top_authors_{t}.csv"))
-    _export_rows_to_xlsx(rows, os.path.join(EXPORT_DIR, f"top_authors_{t}.xlsx"), "TopAuthors")
-    _save_bar([r["penulis"] for r in rows], [r["total_dipinjam"] for r in rows],
-              f"Top {n} Penulis (Katalog)", f"chart_top_authors_{t}.png", xlabel="Penulis")
+# field → (prefix file, nama sheet, label)
+TOP_EXPORTS = {
+    "penulis": ("top_authors", "TopAuthors", "Penulis"),
+    "penerbit": ("top_publishers", "TopPublishers", "Penerbit"),
+    "judul": ("top_titles", "TopTitles", "Judul"),
+}
+
+def _write_top_report(field: str, rows: list[dict], n: int, t: str) -> list[str]:
+    """Tulis Top-N `field` → CSV + XLSX + chart. Return path yang dibuat."""
+    prefix, sheet, label = TOP_EXPORTS[field]
+    paths = [os.path.join(EXPORT_DIR, f"{prefix}_{t}.csv")]
+    _export_rows_to_csv(rows, paths[0])
+    xlsx = _export_rows_to_xlsx(rows, os.path.join(EXPORT_DIR, f"{prefix}_{t}.xlsx"), sheet)
+    if xlsx: paths.append(xlsx)
+    paths.append(_save_bar([r[field] for r in rows], [r["total_dipinjam"] for r in rows],
+                           f"Top {n} {label} (Katalog)", f"chart_{prefix}_{t}.png", xlabel=label))
+    return paths
+
+def export_top_authors(n: int) -> list[str]:
+    paths = _write_top_report("penulis", _top_by("penulis", n), n, _nowstamp())
     print("Export Top Penulis → CSV/XLSX + chart di 'outputs/'.")
+    return paths
 
-def export_top_publishers(n: int) -> None:
-    rows = _top_by("penerbit", n); t = _nowstamp()
-    _export_rows_to_csv(rows, os.path.join(EXPORT_DIR, f"top_publishers_{t}.csv"))
-    _export_rows_to_xlsx(rows, os.path.join(EXPORT_DIR, f"top_publishers_{t}.xlsx"), "TopPublishers")
-    _save_bar([r["penerbit"] for r in rows], [r["total_dipinjam"] for r in rows],
-              f"Top {n} Penerbit (Katalog)", f"chart_top_publishers_{t}.png", xlabel="Penerbit")
+def export_top_publishers(n: int) -> list[str]:
+    paths = _write_top_report("penerbit", _top_by("penerbit", n), n, _nowstamp())
     print("Export Top Penerbit → CSV/XLSX + chart di 'outputs/'.")
+    return paths
 
-def export_top_titles(n: int) -> None:
-    rows = _top_by("judul", n); t = _nowstamp()
-    _export_rows_to_csv(rows, os.path.join(EXPORT_DIR, f"top_titles_{t}.csv"))
-    _export_rows_to_xlsx(rows, os.path.join(EXPORT_DIR, f"top_titles_{t}.xlsx"), "TopTitles")
-    _save_bar([r["judul"] for r in rows], [r["total_dipinjam"] for r in rows],
-              f"Top {n} Judul (Katalog)", f"chart_top_titles_{t}.png", xlabel="Judul")
+def export_top_titles(n: int) -> list[str]:
+    paths = _write_top_report("judul", _top_by("judul", n), n, _nowstamp())
     print("Export Top Judul → CSV/XLSX + chart di 'outputs/'.")
+    return paths
+
+# ---------- Batch: semua report sekali jalan ----------
+def export_all_reports(n: int = 10) -> str:
+    """
+    Paket report lengkap (untuk job malam) dari SATU snapshot & SATU pass agregasi:
+    ringkasan status, daftar dipinjam, Top-N penulis/penerbit/judul
+    → CSV/XLSX/chart + manifest JSON. Return path manifest.
+    """
+    with read_snapshot() as snap:
+        version = snap.version
+        agg = _aggregate(snap)  # satu scan: status + semua grup sekaligus
+    t = _nowstamp()
+    files = {"status": _write_status_report(agg, t)}
+    for field in TOP_EXPORTS:
+        files[TOP_EXPORTS[field][0]] = _write_top_report(field, top_rows(agg, field, n), n, t)
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "catalog_version": list(version) if version else None,
+        "top_n": n,
+        "summary": status_summary(agg),
+        "files": {k: [os.path.relpath(p, EXPORT_DIR) for p in v] for k, v in files.items()},
+    }
+    path = os.path.join(EXPORT_DIR, f"manifest_{t}.json")
+    write_json_atomic(path, manifest)  # manifest tidak pernah setengah jadi
+    print(f"Semua report diekspor ({sum(len(v) for v in files.values())} file) → {path}")
+    return path
+
+# ---------- Analytics statistik (NumPy, opsional) ----------
+def _analytics_np(load: bool = True):
+    """
+    Modul analytics_np; numpy baru di-import saat statistik dipakai, bukan saat CLI start.
+    `load=False` → None jika modul belum pernah di-import (berarti belum ada kolom ter-cache).
+    """
+    if not load:
+        return sys.modules.get(f"{__package__}.analytics_np")
+    from . import analytics_np
+    return analytics_np
+
+# kind → (judul, fungsi di analytics_np, kolom label chart, kolom nilai chart, xlabel, prefix file, sheet)
+STATS_REPORTS = {
+    "tahun": ("Distribusi Tahun Terbit", "year_histogram", "tahun", "jumlah_buku",
+              "Tahun", "stats_years", "YearHistogram"),
+    "persentil": ("Persentil Dipinjam", "borrow_percentiles", "statistik", "dipinjam",
+                  "Statistik", "stats_percentiles", "Percentiles"),
+    "dekade": ("Statistik per Dekade", "decade_stats", "dekade", "total_dipinjam",
+               "Dekade", "stats_decades", "Decades"),
+    "penerbit": ("Statistik per Penerbit", "publisher_stats", "penerbit", "total_dipinjam",
+                 "Penerbit", "stats_publishers", "Publishers"),
+}
+CHART_MAX_BARS = 30  # chart dibatasi agar label tetap terbaca (CSV/XLSX tetap lengkap)
+
+def _columns() -> dict:
+    """Kolom NumPy katalog saat ini; dibangun sekali per versi snapshot."""
+    with read_snapshot() as snap:
+        return _analytics_np().columns_for(snap.books, snap.version)
+
+def _stats_rows(kind: str) -> list[dict] | None:
+    np_mod = _analytics_np()
+    if not np_mod.HAS_NUMPY:
+        print("Info: 'numpy' belum terpasang → statistik lanjutan tidak tersedia.")
+        return None
+    fn = getattr(np_mod, STATS_REPORTS[kind][1])
+    return fn(_columns())
+
+def _save_stats_chart(kind: str, rows: list[dict], t: str) -> str:
+    title, _, label, value, xlabel, prefix, _ = STATS_REPORTS[kind]
+    shown = rows[:CHART_MAX_BARS]
+    return _save_bar([str(r[label]) for r in shown], [r[value] for r in shown],
+                     title, f"chart_{prefix}_{t}.png", xlabel=xlabel)
+
+def analytics_stats(kind: str) -> None:
+    """Tampilkan statistik NumPy (`kind` ∈ STATS_REPORTS) + simpan chart."""
+    rows = _stats_rows(kind)
+    if rows is None: return
+    if not rows: print("Belum ada data."); return
+    print(f"\n{STATS_REPORTS[kind][0]} (katalog):")
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
+    _save_stats_chart(kind, rows, _nowstamp())
+
+def export_stats(kind: str) -> list[str]:
+    """Export statistik NumPy → CSV/XLSX + chart di 'outputs/'. Return path yang dibuat."""
+    rows = _stats_rows(kind)
+    if rows is None: return []
+    _, _, _, _, _, prefix, sheet = STATS_REPORTS[kind]; t = _nowstamp()
+    paths = [os.path.join(EXPORT_DIR, f"{prefix}_{t}.csv")]
+    _export_rows_to_csv(rows, paths[0])
+    xlsx = _export_rows_to_xlsx(rows, os.path.join(EXPORT_DIR, f"{prefix}_{t}.xlsx"), sheet)
+    if xlsx: paths.append(xlsx)
+    if rows:
+        paths.append(_save_stats_chart(kind, rows, t))
+    print(f"Export {STATS_REPORTS[kind][0]} → CSV/XLSX + chart di 'outputs/'.")
+    return paths
@@ -0,0 +1,463 @@
+# src/library_manager/shards.py
+"""
+Katalog ter-shard: beberapa file data + router.
+
+Tanpa shard, semua cabang berada di satu `data/books.json`: setiap tulis menulis ulang
+semuanya dan setiap baca mem-parse semuanya. Dengan shard:
+
+    data/shards/manifest.json        → strategi & daftar shard (jarang berubah)
+    data/shards/books_<kunci>.json   → isi shard (format sama dengan books.json)
+    data/shards/directory.jsonl      → (mode cabang) log append-only id→shard
+
+Strategi partisi:
+- "range" : per rentang ID (`range_size` ID per shard) → rute point-op cukup dari ID.
+- "branch": per cabang (field `cabang`, diisi lewat form tambah/update buku; default "umum")
+  → rute via direktori id→shard. Direktori hanya ditambah baris untuk id yang berubah
+  (tambah/hapus/pindah cabang), dan pembaca hanya mem-parse baris baru sejak bacaan terakhir
+  → biaya ∝ perubahan, bukan katalog. Direktori dipadatkan (ditulis ulang berisi id hidup saja)
+  saat split, dan begitu jumlah barisnya > `DIRECTORY_COMPACT_FACTOR` × jumlah id hidup.
+
+Router:
+- point-op (`get`, `apply_many`, `insert`, `remove`) hanya menyentuh SATU shard per buku;
+- `save_all` (partisi ulang seluruh katalog) hanya menulis shard yang isinya berubah;
+- query, keyword, dan agregasi di-fan-out per shard lalu digabung. Index & partial
+  agregasi di-cache per versi shard → setelah satu peminjaman, hanya shard itu yang dihitung ulang.
+- hasil gabungan (`load_all`, daftar dipinjam, urutan seri Top-N) dikembalikan ke urutan ID,
+  jadi sama dengan katalog satu file apa pun strateginya.
+"""
+
+from __future__ import annotations
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Sequence
+
+from .analytics import ALL_FIELDS, aggregate_chunk, merge_partials
+from .pager import sort_rows
+from .query import CatalogIndex, plan, run_query
+from .snapshot import write_json_atomic
+
+MANIFEST = "manifest.json"
+DIRECTORY = "directory.jsonl"
+STRATEGIES = ("range", "branch")
+RANGE_SIZE = 1000
+BRANCH_FIELD = "cabang"
+DEFAULT_BRANCH = "umum"
+DIRECTORY_COMPACT_FACTOR = 4  # tulis ulang direktori jika baris > 4 × id hidup ...
+DIRECTORY_COMPACT_MIN = 1024  # ... dan > 4 × 1024 baris (katalog kecil tidak perlu)
+
+
+def _stat_version(path: str) -> tuple | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _aggregate_shard_file(path: str, fields: Sequence[str]) -> tuple:
+    """Worker: parse satu file shard → (versi, partial)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            st = os.fstat(f.fileno())
+            books = json.load(f)
+    except FileNotFoundError:
+        return None, aggregate_chunk([], fields)
+    return (st.st_ino, st.st_mtime_ns, st.st_size), aggregate_chunk(books, fields)
+
+def _by_id(book) -> int:
+    return int(book.get("id") or 0)
+
+
+class ShardRouter:
+    """Rute operasi katalog ke shard-shard di `shard_dir` sesuai manifest."""
+
+    def __init__(self, shard_dir: str, manifest: dict):
+        self.shard_dir = shard_dir
+        self.manifest = manifest
+        self.strategy = manifest.get("strategy", "range")
+        self.range_size = int(manifest.get("range_size", RANGE_SIZE))
+        self.field = manifest.get("field", BRANCH_FIELD)
+        self._cache: dict[str, tuple] = {}      # key → (versi, books)
+        self._indexes: dict[str, tuple] = {}    # key → (versi, CatalogIndex)
+        self._partials: dict[tuple, tuple] = {} # (key, fields) → (versi, partial)
+        self._dir: dict[str, str] = {}          # id → shard (mode cabang)
+        self._dir_pos: tuple = (None, 0)        # (inode, offset) bacaan terakhir directory.jsonl
+        self._dir_lines = 0                     # jumlah baris direktori yang sudah dibaca
+
+    # ---------- Rute ----------
+    def key_for(self, book: dict) -> str:
+        if self.strategy == "branch":
+            name = str(book.get(self.field) or DEFAULT_BRANCH).strip().lower()
+            return re.sub(r"[^0-9a-z]+", "_", name).strip("_") or DEFAULT_BRANCH
+        lo = (int(book.get("id", 0)) // self.range_size) * self.range_size
+        return f"r{lo:09d}"
+
+    def key_for_id(self, book_id: int) -> str | None:
+        if self.strategy == "branch":
+            return self._directory().get(str(book_id))
+        return self.key_for({"id": book_id})
+
+    def keys(self) -> list[str]:
+        return sorted(self.manifest.get("shards", []))
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.shard_dir, f"books_{key}.json")
+
+    def version(self) -> tuple:
+        """Versi gabungan: manifest + semua file shard."""
+        return (_stat_version(os.path.join(self.shard_dir, MANIFEST)),) + tuple(
+            (k, _stat_version(self.path(k))) for k in self.keys())
+
+    # ---------- Direktori id→shard (mode cabang) ----------
+    def _directory(self) -> dict[str, str]:
+        """Direktori terkini; hanya baris yang ditambahkan sejak bacaan terakhir yang di-parse."""
+        path = os.path.join(self.shard_dir, DIRECTORY)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._dir, self._dir_pos, self._dir_lines = {}, (None, 0), 0
+            return self._dir
+        ino, pos = self._dir_pos
+        if ino != st.st_ino or st.st_size < pos:  # file ditulis ulang (split/pemadatan) → baca dari awal
+            self._dir, pos, self._dir_lines = {}, 0, 0
+        if st.st_size > pos:
+            with open(path, "rb") as f:
+                f.seek(pos)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # baris belum selesai ditulis
+                    pos += len(line)
+                    if line.strip():
+                        self._dir_lines += 1
+                        e = json.loads(line)
+                        if e.get("shard") is None:
+                            self._dir.pop(str(e.get("id")), None)
+                        else:
+                            self._dir[str(e.get("id"))] = e["shard"]
+        self._dir_pos = (st.st_ino, pos)
+        return self._dir
+
+    def _append_directory(self, entries: dict[str, str | None]) -> None:
+        """Tambahkan perubahan id→shard (None = id dihapus); padatkan jika log sudah terlalu panjang."""
+        if not entries:
+            return
+        os.makedirs(self.shard_dir, exist_ok=True)
+        lines = "".join(json.dumps({"id": i, "shard": k}) + "\n" for i, k in entries.items())
+        with open(os.path.join(self.shard_dir, DIRECTORY), "a", encoding="utf-8") as f:
+            f.write(lines)
+        live = self._directory()
+        if self._dir_lines > DIRECTORY_COMPACT_FACTOR * max(len(live), DIRECTORY_COMPACT_MIN):
+            self._write_directory(live)
+
+    def _write_directory(self, entries: dict[str, str]) -> None:
+        """Tulis ulang direktori berisi `entries` saja (file sementara + `os.replace`)."""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.shard_dir, prefix=f"{DIRECTORY}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps({"id": i, "shard": k}) + "\n" for i, k in entries.items()))
+            os.replace(tmp, os.path.join(self.shard_dir, DIRECTORY))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._dir_pos = (None, 0)  # pembaca (termasuk proses lain) melihat inode baru → baca ulang
+        self._directory()
+
+    # ---------- IO per shard ----------
+    def _read(self, key: str) -> tuple[tuple | None, list[dict]]:
+        """(versi, isi) shard; di-cache per versi file (jangan diubah langsung)."""
+        v = _stat_version(self.path(key))
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == v:
+            return hit
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as f:
+                st = os.fstat(f.fileno())
+                books = json.load(f)
+            v = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            v, books = None, []
+        self._cache[key] = (v, books)
+        return v, books
+
+    def load_shard(self, key: str) -> list[dict]:
+        """Isi shard sebagai salinan yang boleh diubah."""
+        return [dict(b) for b in self._read(key)[1]]
+
+    def save_shard(self, key: str, books: list[dict]) -> None:
+        write_json_atomic(self.path(key), books)
+        self._cache.pop(key, None)
+
+    def _save_manifest(self) -> None:
+        self.manifest["shards"] = sorted(set(self.manifest.get("shards", [])))
+        write_json_atomic(os.path.join(self.shard_dir, MANIFEST), self.manifest)
+
+    def _add_shards(self, keys: Iterable[str]) -> None:
+        """Daftarkan shard baru di manifest (manifest hanya ditulis jika memang ada yang baru)."""
+        if set(keys) - set(self.keys()):
+            self.manifest["shards"] = list(set(self.keys()) | set(keys))
+            self._save_manifest()
+
+    # ---------- Seluruh katalog ----------
+    def load_all(self, copy: bool = True, retries: int = 3) -> tuple[tuple, list[dict]]:
+        """
+        Gabungan semua shard, urut ID (sama dengan katalog satu file, apa pun strateginya).
+        Versi dicek sebelum & sesudah baca (optimistic): jika ada commit di tengah jalan,
+        baca ulang agar tidak torn.
+        """
+        for _ in range(max(1, retries)):
+            before = self.version()
+            books = []
+            for k in self.keys():
+                books.extend(self._read(k)[1])
+            if self.version() == before:
+                break
+        books.sort(key=_by_id)  # mode rentang: sudah hampir urut → timsort ~linear
+        if copy:
+            books = [dict(b) for b in books]
+        return before, books
+
+    def save_all(self, books: Sequence[dict]) -> list[str]:
+        """Partisi ulang `books`; hanya shard yang isinya berubah yang ditulis. Return kunci yang ditulis."""
+        groups: dict[str, list[dict]] = {}
+        for b in books:
+            groups.setdefault(self.key_for(b), []).append(b)
+        written = []
+        for k in sorted(set(groups) | set(self.keys())):
+            new = groups.get(k, [])
+            if self._read(k)[1] != new:
+                self.save_shard(k, new)
+                written.append(k)
+        if self.strategy == "branch":
+            cur = self._directory()
+            new_dir = {str(b.get("id")): self.key_for(b) for b in books}
+            diff: dict[str, str | None] = {i: k for i, k in new_dir.items() if cur.get(i) != k}
+            diff.update({i: None for i in cur if i not in new_dir})
+            self._append_directory(diff)
+        self._add_shards(groups)
+        return written
+
+    # ---------- Point-op ----------
+    def get(self, book_id: int) -> dict | None:
+        key = self.key_for_id(book_id)
+        keys = [key] if key is not None else self.keys()
+        for k in keys:
+            for b in self._read(k)[1]:
+                if b.get("id") == book_id:
+                    return dict(b)
+        return None
+
+    def apply_many(self, ids: Iterable[int],
+                   mutate: Callable[[dict], str | None]) -> tuple[list[dict], dict]:
+        """
+        Read-modify-write per buku pada isi shard TERBARU — tiap shard terkait dibaca & ditulis SEKALI.
+        `mutate(book)` mengubah buku di tempat dan return None, atau return alasan gagal (buku tidak ditulis).
+        Buku yang pindah cabang dipindahkan ke shard barunya.
+        Return (buku yang ditulis, {id: alasan gagal}).
+        """
+        by_shard: dict[str, list[int]] = {}
+        errors: dict = {}
+        for i in ids:
+            k = self.key_for_id(i)
+            if k is None:
+                errors[i] = "ID tidak ditemukan."  # mis. sudah dihapus meja lain
+            else:
+                by_shard.setdefault(k, []).append(i)
+        written: list[dict] = []
+        moved: dict[str, list[dict]] = {}
+        for k, kids in by_shard.items():
+            books = self.load_shard(k)
+            pos = {b.get("id"): b for b in books}
+            hit = []
+            for i in kids:
+                b = pos.get(i)
+                err = "ID tidak ditemukan." if b is None else mutate(b)
+                if err:
+                    errors[i] = err
+                else:
+                    hit.append(b)
+            if not hit:
+                continue
+            out = [b for b in hit if self.key_for(b) != k]
+            for b in out:
+                moved.setdefault(self.key_for(b), []).append(b)
+            if out:
+                gone = {b.get("id") for b in out}
+                books = [b for b in books if b.get("id") not in gone]
+            self.save_shard(k, books)
+            written.extend(hit)
+        for new, bs in moved.items():
+            self.save_shard(new, self.load_shard(new) + bs)
+        self._append_directory({str(b.get("id")): new for new, bs in moved.items() for b in bs})
+        self._add_shards(moved)
+        return written, errors
+
+    def insert(self, book: dict) -> str | None:
+        """Tambah satu buku; hanya shard tujuannya yang dibaca & ditulis. Return alasan gagal / None."""
+        bid, k = book.get("id"), self.key_for(book)
+        if self.strategy == "branch":
+            taken = self.key_for_id(bid) is not None
+        else:
+            taken = any(b.get("id") == bid for b in self._read(k)[1])
+        if taken:
+            return "ID sudah dipakai."
+        self.save_shard(k, self.load_shard(k) + [dict(book)])
+        if self.strategy == "branch":
+            self._append_directory({str(bid): k})
+        self._add_shards([k])
+        return None
+
+    def remove(self, book_id: int,
+               check: Callable[[dict], str | None] | None = None) -> tuple[dict | None, str | None]:
+        """
+        Hapus satu buku; hanya shard miliknya yang dibaca & ditulis. `check(book)` → alasan
+        menolak (dicek pada isi shard terbaru). Return (buku yang dihapus, None) / (None, alasan).
+        """
+        k = self.key_for_id(book_id)
+        books = self.load_shard(k) if k is not None else []
+        book = next((b for b in books if b.get("id") == book_id), None)
+        if book is None:
+            return None, "ID tidak ditemukan."
+        err = check(book) if check else None
+        if err:
+            return None, err
+        self.save_shard(k, [b for b in books if b.get("id") != book_id])
+        if self.strategy == "branch":
+            self._append_directory({str(book_id): None})
+        return book, None
+
+    def put_many(self, changed: Iterable[dict]) -> int:
+        """Timpa record yang sudah ada (by id). Return jumlah record ditulis."""
+        upd = {c.get("id"): c for c in changed}
+        written, _ = self.apply_many(list(upd), lambda b: b.update(upd[b.get("id")]))
+        return len(written)
+
+    # ---------- Fan-out ----------
+    def aggregate(self, fields: Sequence[str] = ALL_FIELDS, workers: int | None = None) -> tuple[tuple, dict]:
+        """
+        Agregasi per shard (partial di-cache per versi shard) lalu digabung berurutan.
+        Shard yang berubah dihitung ulang — paralel jika lebih dari satu.
+        Return (versi, agg); versi disusun dari versi file yang BENAR-BENAR dibaca untuk tiap
+        partial (format sama dengan `version()`), jadi commit di tengah jalan membuat versi
+        ini berbeda dari snapshot caller → caller bisa jatuh ke jalur lambat.
+        """
+        fields = tuple(fields)
+        manifest_v = _stat_version(os.path.join(self.shard_dir, MANIFEST))
+        keys = self.keys()
+        stale = []
+        for k in keys:
+            hit = self._partials.get((k, fields))
+            if hit is None or hit[0] != _stat_version(self.path(k)):
+                stale.append(k)
+        w = max(1, workers or os.cpu_count() or 1)
+        if len(stale) > 1 and w > 1:
+            with ProcessPoolExecutor(max_workers=min(w, len(stale))) as ex:
+                results = ex.map(_aggregate_shard_file, [self.path(k) for k in stale], [fields] * len(stale))
+                for k, res in zip(stale, results):
+                    self._partials[(k, fields)] = res
+        else:
+            for k in stale:
+                v, books = self._read(k)
+                self._partials[(k, fields)] = (v, aggregate_chunk(books, fields))
+        parts = [self._partials[(k, fields)] for k in keys]
+        version = (manifest_v,) + tuple((k, v) for k, (v, _) in zip(keys, parts))
+        agg = merge_partials((p for _, p in parts), fields)
+        agg["borrowed"].sort(key=_by_id)  # urutan katalog (ID), bukan urutan shard
+        if "judul" in fields:
+            agg["judul"].sort(key=lambda row: int(row[2] or 0))  # seri Top-N judul = urutan ID
+        return version, agg
+
+    def _index(self, key: str) -> CatalogIndex:
+        v, books = self._read(key)
+        hit = self._indexes.get(key)
+        if hit is None or hit[0] != v:
+            hit = self._indexes[key] = (v, CatalogIndex(books))
+        return hit[1]
+
+    def query(self, sort: str | None = None, desc: bool = False, limit: int | None = None,
+              **criteria) -> tuple[list[dict], list[str]]:
+        """Query AND di tiap shard (index per shard) → gabung → urut & limit."""
+        rows: list[dict] = []
+        widest = None
+        for k in self.keys():
+            idx = self._index(k)
+            if widest is None or len(idx.books) > len(widest.books):
+                widest = idx
+            rows.extend(run_query(idx, **criteria))
+            if not sort and limit and len(rows) >= limit:
+                break  # tanpa urutan: cukup sampai limit terpenuhi
+        if sort:
+            rows = sort_rows(rows, sort, desc)
+        if limit is not None and limit > 0:
+            rows = rows[:limit]
+        steps = [f"fan-out {len(self.keys())} shard"]
+        if widest is not None:
+            steps += plan(widest, **criteria)
+        return [dict(b) for b in rows], steps
+
+    def status(self) -> list[dict]:
+        out = []
+        for k in self.keys():
+            p = self.path(k)
+            out.append({"shard": k, "file": os.path.basename(p), "jumlah_buku": len(self._read(k)[1]),
+                        "ukuran_kb": round(os.path.getsize(p) / 1024, 1) if os.path.exists(p) else 0})
+        return out
+
+
+# ---------- Buka / buat / gabung ----------
+_ROUTERS: dict[str, tuple] = {}
+
+def open_router(shard_dir: str) -> ShardRouter | None:
+    """Router untuk `shard_dir` (None jika belum ada manifest → mode satu file)."""
+    mpath = os.path.join(shard_dir, MANIFEST)
+    v = _stat_version(mpath)
+    if v is None:
+        _ROUTERS.pop(shard_dir, None)
+        return None
+    hit = _ROUTERS.get(shard_dir)
+    if hit is not None and hit[0] == v:
+        return hit[1]
+    with open(mpath, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    router = ShardRouter(shard_dir, manifest)
+    if hit is not None:  # manifest berubah → cache isi/index/partial tetap valid per versi file
+        old = hit[1]
+        router._cache, router._indexes, router._partials = old._cache, old._indexes, old._partials
+        router._dir, router._dir_pos, router._dir_lines = old._dir, old._dir_pos, old._dir_lines
+    _ROUTERS[shard_dir] = (v, router)
+    return router
+
+def split_catalog(books: Sequence[dict], shard_dir: str, by: str = "range",
+                  range_size: int = RANGE_SIZE, field: str = BRANCH_FIELD) -> ShardRouter:
+    """Pecah katalog ke shard + tulis manifest. Return router baru."""
+    if by not in STRATEGIES:
+        raise ValueError(f"Strategi shard tidak dikenal: {by!r} (pilih: {', '.join(STRATEGIES)})")
+    manifest = {"strategy": by, "range_size": max(1, range_size), "field": field, "shards": []}
+    if os.path.exists(os.path.join(shard_dir, DIRECTORY)):
+        os.remove(os.path.join(shard_dir, DIRECTORY))  # sisa split lama
+    router = ShardRouter(shard_dir, manifest)
+    router.save_all(books)
+    router._save_manifest()
+    return open_router(shard_dir)
+
+def join_catalog(shard_dir: str, target: str) -> list[dict]:
+    """
+    Gabung semua shard ke file `target` (kembali ke satu file). `target` ditulis atomik
+    DULU; manifest & file shard baru dihapus setelah penulisan itu berhasil.
+    """
+    router = open_router(shard_dir)
+    if router is None:
+        return []
+    _, books = router.load_all()
+    write_json_atomic(target, books)
+    os.remove(os.path.join(shard_dir, MANIFEST))
+    if os.path.exists(os.path.join(shard_dir, DIRECTORY)):
+        os.remove(os.path.join(shard_dir, DIRECTORY))
+    for k in router.keys():
+        if os.path.exists(router.path(k)):
+            os.remove(router.path(k))
+    _ROUTERS.pop(shard_dir, None)
+    return books
@@ -0,0 +1,147 @@
+# src/library_manager/snapshot.py
+"""
+Snapshot baca copy-on-write (gaya MVCC) untuk katalog.
+
+Masalah yang diselesaikan:
+- Report/export yang panjang bisa membaca katalog berkali-kali sementara meja lain
+  menyimpan perubahan → hasil campuran beberapa versi (torn state).
+- Mengunci file untuk report akan memblokir penulis (peminjaman/pengembalian).
+
+Cara kerja:
+- Penulis TIDAK pernah menimpa file di tempat: `save_books()` menulis file baru lalu
+  `os.replace` (atomik, lihat `write_json_atomic`). Pembaca yang sudah membuka versi lama
+  tetap melihat versi lama.
+- Pembaca mem-"pin" satu versi (`SnapshotStore.pin` / `read`) → dapat `CatalogSnapshot`
+  yang immutable (tuple of `FrozenBook`) dan tidak berubah selama dipegang.
+- Versi lama dilepas dari memori begitu tidak ada pembaca yang memegangnya.
+- Pembaca berikutnya pada versi yang sama memakai ulang snapshot (tanpa parse ulang).
+"""
+
+from __future__ import annotations
+import json
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterator, Sequence
+
+
+def write_json_atomic(path: str, data, indent: int | None = 2) -> None:
+    """
+    Tulis JSON ke file sementara lalu `os.replace` ke `path`.
+    Nama file sementara unik per pemanggilan (`mkstemp`), jadi beberapa thread/proses yang
+    menulis `path` bersamaan tidak saling menimpa file sementaranya.
+    Jika penulisan gagal, file sementara dihapus dan `path` lama tetap utuh.
+    """
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        try:  # mkstemp membuat file 0600 → samakan dengan izin file lama
+            os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class FrozenBook(dict):
+    """dict read-only untuk isi snapshot. `copy()` menghasilkan dict biasa yang boleh diubah."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Data snapshot bersifat read-only; gunakan .copy() untuk mengubah.")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __reduce__(self):
+        # agar bisa di-pickle ke worker ProcessPoolExecutor
+        return (FrozenBook, (dict(self),))
+
+
+class CatalogSnapshot:
+    """Satu versi katalog yang immutable."""
+
+    __slots__ = ("version", "books", "_refs", "_by_id")
+
+    def __init__(self, version: Hashable, books: Sequence[dict]):
+        self.version = version
+        self.books: tuple[FrozenBook, ...] = tuple(FrozenBook(b) for b in books)
+        self._refs = 0
+        self._by_id: dict | None = None
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def get(self, book_id: int) -> FrozenBook | None:
+        """Cari by id (index dibangun malas sekali per snapshot)."""
+        if self._by_id is None:
+            self._by_id = {b.get("id"): b for b in self.books}
+        return self._by_id.get(book_id)
+
+
+class SnapshotStore:
+    """
+    Pengelola versi snapshot.
+    - `version_fn()` : penanda versi katalog saat ini tanpa membaca isi (mis. stat file).
+    - `read_fn()`    : (versi, books) yang dibaca secara konsisten dari satu file handle.
+    """
+
+    def __init__(self, version_fn: Callable[[], Hashable],
+                 read_fn: Callable[[], tuple[Hashable, list[dict]]]):
+        self._version_fn = version_fn
+        self._read_fn = read_fn
+        self._lock = threading.Lock()
+        self._versions: dict[Hashable, CatalogSnapshot] = {}
+        self._latest: Hashable = None
+
+    def pin(self) -> CatalogSnapshot:
+        """Pegang versi terbaru. WAJIB dipasangkan dengan `release()` (atau pakai `read()`)."""
+        with self._lock:
+            v = self._version_fn()
+            snap = self._versions.get(v)
+            if snap is None:
+                v, books = self._read_fn()
+                snap = self._versions.get(v)
+                if snap is None:
+                    snap = self._versions[v] = CatalogSnapshot(v, books)
+            if v != self._latest:
+                old, self._latest = self._latest, v
+                self._drop_if_unused(old)
+            snap._refs += 1
+            return snap
+
+    def release(self, snap: CatalogSnapshot) -> None:
+        with self._lock:
+            snap._refs = max(0, snap._refs - 1)
+            if snap.version != self._latest:
+                self._drop_if_unused(snap.version)
+
+    @contextmanager
+    def read(self) -> Iterator[CatalogSnapshot]:
+        """`with store.read() as snap:` → satu versi konsisten selama blok berjalan."""
+        snap = self.pin()
+        try:
+            yield snap
+        finally:
+            self.release(snap)
+
+    def live_versions(self) -> list[Hashable]:
+        """Versi yang masih disimpan (terbaru + yang masih dipegang pembaca)."""
+        with self._lock:
+            return list(self._versions)
+
+    def _drop_if_unused(self, version: Hashable) -> None:
+        snap = self._versions.get(version)
+        if snap is not None and snap._refs == 0:
+            del self._versions[version]
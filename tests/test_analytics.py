@@ -0,0 +1,48 @@
+"""
+Test engine map-reduce: hasil gabungan partial (chunk & rentang byte JSONL)
+harus identik dengan agregasi satu pass.
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from library_manager import analytics
+
+BOOKS = json.loads((Path(__file__).resolve().parents[1] / "data" / "books.json").read_text(encoding="utf-8"))
+
+
+def _reference_top(books, field, top_n):
+    """Salinan logika `_top_by` versi lama (loop tunggal) sebagai pembanding."""
+    if field == "judul":
+        rows = [{"judul": b.get("judul"), "total_dipinjam": int(b.get("dipinjam", 0))} for b in books]
+        rows.sort(key=lambda r: (-r["total_dipinjam"], r["judul"].lower()))
+        return rows[:max(1, top_n)]
+    agg, extra = defaultdict(int), defaultdict(int)
+    for b in books:
+        k = (b.get(field) or "").strip() or "(Tidak diketahui)"
+        agg[k] += int(b.get("dipinjam", 0)); extra[k] += 1
+    rows = [{field: k, "total_dipinjam": v, "jumlah_judul": extra[k]} for k, v in agg.items()]
+    rows.sort(key=lambda r: (-r["total_dipinjam"], -(r.get("jumlah_judul") or 0), str(r)))
+    return rows[:max(1, top_n)]
+
+
+def test_merged_chunks_match_single_pass():
+    books = BOOKS * 7
+    serial = analytics.aggregate_books(books)
+    merged = analytics.merge_partials(analytics.aggregate_chunk(books[i:i + 13]) for i in range(0, len(books), 13))
+    assert merged == serial
+    for field in analytics.ALL_FIELDS:
+        for n in (1, 5, 1000):
+            assert analytics.top_rows(merged, field, n) == _reference_top(books, field, n)
+    borrowed = [b for b in books if b.get("status") == "borrowed"]
+    assert merged["borrowed"] == borrowed
+    assert analytics.status_summary(merged)["buku_dipinjam"] == len(borrowed)
+
+
+def test_jsonl_byte_ranges_match(tmp_path):
+    seg1, seg2 = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    analytics.write_jsonl(BOOKS * 3, str(seg1))
+    analytics.write_jsonl(BOOKS, str(seg2))
+    agg = analytics.aggregate_jsonl([str(seg1), str(seg2)], workers=3, min_bytes=0)
+    assert agg == analytics.aggregate_books(BOOKS * 4)
@@ -0,0 +1,57 @@
+"""
+Test analytics NumPy: Top-N tervektor identik dengan engine map-reduce,
+dan statistik grup konsisten dengan perhitungan Python biasa.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from library_manager import analytics, analytics_np
+
+BOOKS = json.loads((Path(__file__).resolve().parents[1] / "data" / "books.json").read_text(encoding="utf-8"))
+
+
+def test_top_n_matches_map_reduce():
+    books = BOOKS * 3 + [{"judul": "Tanpa Penulis", "penulis": "  ", "dipinjam": 2, "status": "available"}]
+    cols = analytics_np.build_columns(books)
+    agg = analytics.aggregate_books(books)
+    for field in analytics.ALL_FIELDS:
+        for n in (1, 3, 7, 1000):
+            assert analytics_np.top_n(cols, field, n) == analytics.top_rows(agg, field, n)
+
+
+def test_grouped_stats_and_histogram():
+    cols = analytics_np.build_columns(BOOKS)
+    hist = analytics_np.year_histogram(cols)
+    assert sum(r["jumlah_buku"] for r in hist) == len(BOOKS)
+
+    dec = analytics_np.decade_stats(cols)
+    assert sum(r["total_dipinjam"] for r in dec) == sum(b["dipinjam"] for b in BOOKS)
+    assert sum(r["sedang_dipinjam"] for r in dec) == sum(b["status"] == "borrowed" for b in BOOKS)
+
+    pub = analytics_np.publisher_stats(cols)
+    gramedia = [b["dipinjam"] for b in BOOKS if b["penerbit"] == "Gramedia"]
+    row = next(r for r in pub if r["penerbit"] == "Gramedia")
+    assert row["jumlah_judul"] == len(gramedia) and row["maks_dipinjam"] == max(gramedia)
+
+    pct = {r["statistik"]: r["dipinjam"] for r in analytics_np.borrow_percentiles(cols)}
+    assert pct["p50"] == statistics.median(b["dipinjam"] for b in BOOKS)
+
+
+def test_columns_cached_per_version():
+    cols = analytics_np.columns_for(BOOKS, ("v", 1))
+    assert analytics_np.columns_for([], ("v", 1)) is cols
+    assert analytics_np.cached_columns(("v", 2)) is None
+
+
+def test_cli_start_does_not_import_numpy():
+    code = "import sys, library_manager.cli; print('numpy' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
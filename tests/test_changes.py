@@ -0,0 +1,139 @@
+"""
+Test change feed: seq naik monoton per mutasi, pencarian posisi `--since`
+setara scan penuh, dan export inkremental hanya memuat perubahan sejak checkpoint.
+"""
+
+import csv
+import io
+import json
+import multiprocessing as mp
+
+import pytest
+
+from library_manager import changes, cli, scan, services
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(services, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(services, "DATA_FILE", str(tmp_path / "books.json"))
+    monkeypatch.setattr(services, "SHARD_DIR", str(tmp_path / "shards"))
+    monkeypatch.setattr(services, "CHANGES_FILE", str(tmp_path / "changes.jsonl"))
+    monkeypatch.setattr(services, "CHECKPOINT_FILE", str(tmp_path / "changes_checkpoint.json"))
+    services.save_books([
+        {"id": i, "judul": f"Buku {i}", "dipinjam": 0, "status": "available",
+         "tanggal_pinjam": None, "tanggal_kembali": None} for i in range(1, 6)
+    ])
+    return tmp_path
+
+
+def test_seq_is_monotonic_and_seek_matches_full_scan(tmp_path):
+    path = str(tmp_path / "feed.jsonl")
+    assert changes.last_seq(path) == 0
+    seqs = []
+    for i in range(120):
+        seqs += changes.append(path, "update", [{"id": i % 7, "judul": "x" * (i % 13)}] * (1 + i % 3))
+    assert seqs == list(range(1, len(seqs) + 1))
+    assert changes.last_seq(path) == len(seqs)
+    for since in (0, 1, 57, len(seqs) - 1, len(seqs), len(seqs) + 5):
+        got = [ev["seq"] for ev in changes.read_since(path, since)]
+        assert got == [s for s in seqs if s > since]
+    with pytest.raises(ValueError):
+        changes.append(path, "rename", [{"id": 1}])
+
+
+def test_mutations_land_in_feed(catalog):
+    session = scan.ScanSession("borrow", batch=100, out=io.StringIO())
+    session.scan("1"); session.scan("2")
+    session.close()
+    book = services.find_book_by_id(2)
+    services.mark_returned(book)
+    services.commit_books([book], op="return")
+    services.commit_books([services.find_book_by_id(3)])  # tanpa op → tidak dicatat
+
+    feed = list(changes.read_since(services.CHANGES_FILE))
+    assert [(ev["seq"], ev["op"], ev["id"]) for ev in feed] == [(1, "borrow", 1), (2, "borrow", 2), (3, "return", 2)]
+    assert feed[0]["book"]["status"] == "borrowed" and feed[2]["book"]["status"] == "available"
+
+
+def test_export_since_checkpoint_is_incremental(catalog):
+    services.record_changes("add", [{"id": 6, "judul": "Baru", "status": "available"}])
+    services.record_changes("borrow", [{"id": 6, "judul": "Baru", "status": "borrowed"}])
+    services.record_changes("delete", [{"id": 4, "judul": "Buku 4", "status": "available"}])
+
+    out = io.StringIO()
+    assert services.export_changes(out=out) == (0, 3, 2)  # satu baris per buku
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [(r["seq"], r["op"], r["id"], r["status"]) for r in rows] == [
+        ("2", "borrow", "6", "borrowed"), ("3", "delete", "4", "available")]
+
+    # tidak ada perubahan baru → kosong, checkpoint tetap
+    out = io.StringIO()
+    assert services.export_changes(out=out) == (3, 3, 0) and out.getvalue() == ""
+
+    services.record_changes("return", [{"id": 6, "judul": "Baru", "status": "available"}])
+    out = io.StringIO()
+    assert services.export_changes(fmt="jsonl", out=out) == (3, 4, 1)
+    assert json.loads(out.getvalue())["op"] == "return"
+
+    # --since eksplisit + semua event
+    out = io.StringIO()
+    assert services.export_changes(since=0, fmt="jsonl", out=out, events=True, checkpoint="audit")[2] == 4
+    assert changes.load_checkpoint(services.CHECKPOINT_FILE, "audit") == 4
+
+
+def test_cli_export_writes_file_and_checkpoint(catalog, capsys):
+    services.record_changes("update", [{"id": 1, "judul": "Ganti"}])
+    target = catalog / "delta.csv"
+    assert cli.run_command(["export", "--since", "0", "--out", str(target)]) == 0
+    assert "Ganti" in target.read_text(encoding="utf-8")
+    assert "checkpoint 'default' = 1" in capsys.readouterr().err
+    assert changes.load_checkpoint(services.CHECKPOINT_FILE) == 1
+
+
+@pytest.mark.parametrize("sharded", [False, True])
+def test_commit_records_only_written_books(catalog, sharded):
+    if sharded:
+        services.shard_split(by="range", size=2)
+    gone = services.find_book_by_id(4)
+    services.save_books([b for b in services.load_books() if b["id"] != 4])  # dihapus meja lain
+    book = services.find_book_by_id(3)
+    services.mark_borrowed(book); services.mark_borrowed(gone)
+    assert services.commit_books([book, gone], op="borrow") == 1
+    assert [ev["id"] for ev in changes.read_since(services.CHANGES_FILE)] == [3]
+
+
+def test_feed_order_matches_commit_order_across_processes(catalog):
+    procs = [mp.Process(target=_borrow_and_return, args=(str(catalog), i)) for i in (1, 2, 3)]
+    for p in procs: p.start()
+    for p in procs: p.join(timeout=60)
+    assert all(p.exitcode == 0 for p in procs)
+    feed = list(changes.read_since(services.CHANGES_FILE))
+    assert [ev["seq"] for ev in feed] == list(range(1, 61))
+    # urutan seq = urutan commit: counter `dipinjam` per buku naik tanpa lompatan
+    for i in (1, 2, 3):
+        counts = [ev["book"]["dipinjam"] for ev in feed if ev["id"] == i and ev["op"] == "borrow"]
+        assert counts == list(range(1, 11))
+    assert changes.compact(feed)[-1]["book"] == services.find_book_by_id(feed[-1]["id"])
+
+
+def _borrow_and_return(base, book_id):
+    services.DATA_DIR = base
+    services.DATA_FILE = f"{base}/books.json"
+    services.SHARD_DIR = f"{base}/shards"
+    services.CHANGES_FILE = f"{base}/changes.jsonl"
+    for _ in range(10):
+        for op, check, apply in (("borrow", services.borrow_error, services.mark_borrowed),
+                                 ("return", services.return_error, services.mark_returned)):
+            written, errors = services.apply_books(
+                [book_id], lambda b: check(b) or apply(b), op=op)
+            assert written and not errors
+
+
+def test_since_beyond_feed_end_is_clamped(catalog):
+    for i in range(3):
+        services.record_changes("update", [{"id": 1, "judul": f"v{i}"}])
+    assert services.export_changes(since=999, out=io.StringIO()) == (999, 3, 0)
+    services.record_changes("update", [{"id": 1, "judul": "v3"}])
+    out = io.StringIO()
+    assert services.export_changes(out=out)[1:] == (4, 1) and "v3" in out.getvalue()
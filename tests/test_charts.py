@@ -0,0 +1,51 @@
+"""
+Test backend chart: SVG bawaan valid & lengkap, pemilihan backend,
+dan `_save_bar` mengikuti backend aktif.
+"""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from library_manager import charts, services
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+
+def test_svg_bar_chart_is_well_formed(tmp_path):
+    labels = ["Tere Liye", "Dan Brown & co", "<Anonim>"]
+    path = charts.save_bar_svg(labels, [21, 19, 0], "Top Penulis", str(tmp_path / "c.svg"), xlabel="Penulis")
+    root = ET.parse(path).getroot()
+    rects = root.findall(f"{SVG_NS}rect")
+    assert len(rects) == 1 + len(labels)  # background + batang
+    assert [r.get("fill") for r in rects[1:]] == charts.palette(3)
+    texts = [t.text for t in root.iter(f"{SVG_NS}text")]
+    assert "Top Penulis" in texts and "21" in texts and "<Anonim>" in texts
+    assert any("rotate(-20" in (t.get("transform") or "") for t in root.iter(f"{SVG_NS}text"))
+
+
+def test_save_bar_follows_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(services, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(charts, "BACKEND", "svg")
+    path = services._save_bar(["A", "B"], [1, 2], "Judul", "chart_x.png")
+    assert path.endswith("chart_x.svg") and (tmp_path / "chart_x.svg").exists()
+
+    monkeypatch.setattr(charts, "has_matplotlib", lambda: False)
+    assert charts.resolve_backend("auto") == "svg"
+    assert charts.resolve_backend("png") == "svg"
+
+
+def test_default_backend_keeps_png_when_matplotlib_installed(monkeypatch):
+    monkeypatch.setattr(charts, "BACKEND", "auto")
+    monkeypatch.setattr(charts, "has_matplotlib", lambda: True)
+    assert charts.resolve_backend() == "png"
+    monkeypatch.setattr(charts, "has_matplotlib", lambda: False)
+    assert charts.resolve_backend() == "svg"  # matplotlib opsional → jatuh ke SVG
+
+
+def test_png_backend_still_available(tmp_path, monkeypatch):
+    pytest.importorskip("matplotlib")
+    monkeypatch.setattr(services, "EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(charts, "BACKEND", "png")
+    path = services._save_bar(["A"], [3], "Judul", "chart_y.png")
+    assert (tmp_path / "chart_y.png").read_bytes()[:8] == b"\x89PNG\r\n\x1a\n" and path.endswith(".png")
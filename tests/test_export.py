@@ -5,8 +5,11 @@ Menggunakan tmp_path pytest untuk menyimpan hasil sementara.
 """
 
 import importlib
+import json
 from pathlib import Path
 
+import pytest
+
 def test_report_export_to_csv(tmp_path, monkeypatch):
     # Import services
     services = importlib.import_module("library_manager.services")
@@ -26,3 +29,28 @@ def test_report_export_to_csv(tmp_path, monkeypatch):
     # Cek hasil
     files = list(Path(outputs_dir).glob("*.csv")) if outputs_dir.exists() else []
     assert files, "Export CSV gagal, tidak ada file di lokasi output."
+
+
+def test_export_all_reports_single_pass_matches_individual(tmp_path, monkeypatch):
+    cli = importlib.import_module("library_manager.cli")
+    services = importlib.import_module("library_manager.services")
+    monkeypatch.setattr(services, "EXPORT_DIR", str(tmp_path))
+
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["report", "--all", "--top", "5"])
+    assert exc.value.code == 0
+
+    manifest_path = next(tmp_path.glob("manifest_*.json"))
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    assert set(manifest["files"]) == {"status", "top_authors", "top_publishers", "top_titles"}
+    for names in manifest["files"].values():
+        assert all((tmp_path / name).exists() for name in names)
+    assert not list(tmp_path.glob("*.tmp")), "manifest ditulis atomik (tmp → replace)"
+
+    # hasil batch harus sama persis dengan export satuan; export satuan ditulis ke folder lain
+    # supaya tidak menimpa file batch bila keduanya jatuh di detik (timestamp) yang sama
+    batch_csv = (tmp_path / manifest["files"]["top_authors"][0]).read_text(encoding="utf-8")
+    monkeypatch.setattr(services, "EXPORT_DIR", str(tmp_path / "single"))
+    single = services.export_top_authors(5)
+    assert Path(single[0]).parent == tmp_path / "single"
+    assert Path(single[0]).read_text(encoding="utf-8") == batch_csv
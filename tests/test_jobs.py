@@ -0,0 +1,87 @@
+"""
+Test antrian job export latar belakang: submit langsung kembali dengan ID,
+worker (proses terpisah) menulis file yang sama dengan export biasa,
+dan job identik yang masih pending tidak diantrekan ulang.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+
+import pytest
+
+from library_manager import analytics_np, jobs, services
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(services, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(services, "DATA_FILE", str(tmp_path / "books.json"))
+    monkeypatch.setattr(services, "SHARD_DIR", str(tmp_path / "shards"))
+    monkeypatch.setattr(services, "EXPORT_DIR", str(tmp_path / "outputs"))
+    services.save_books([
+        {"id": i, "judul": f"Buku {i}", "penulis": f"P{i % 3}", "penerbit": "X", "tahun": 2000 + i,
+         "status": "borrowed" if i % 2 else "available", "dipinjam": i} for i in range(1, 9)
+    ])
+    q = jobs.JobQueue()
+    yield q
+    q.shutdown(wait=False)
+
+
+def test_export_runs_in_worker_and_reports_paths(catalog):
+    q = catalog
+    job_id, new = q.submit("top_penulis", 3)
+    assert new and q.jobs[job_id]["status"] in jobs.PENDING
+    assert q.wait(timeout=60)
+    row = q.rows()[0]
+    assert row["job"] == job_id and row["status"] == "selesai" and row["export"] == "Top-3 Penulis"
+    paths = row["output"].splitlines()
+    assert paths and all(os.path.exists(p) for p in paths)
+    assert all(p.startswith(services.EXPORT_DIR) for p in paths)
+    assert q._proc.pid != os.getpid()
+
+
+def test_identical_pending_jobs_are_deduplicated(catalog):
+    q = catalog
+    a, new_a = q.submit("ringkasan")
+    b, new_b = q.submit("ringkasan")
+    c, new_c = q.submit("top_judul", 2)
+    assert (b, new_a, new_b, new_c) == (a, True, False, True) and c != a
+    assert q.wait(timeout=60)
+    # sudah selesai → submit berikutnya jadi job baru
+    d, new_d = q.submit("ringkasan")
+    assert new_d and d not in (a, c)
+    assert q.wait(timeout=60)
+    assert [r["status"] for r in q.rows()] == ["selesai"] * 3
+
+
+def test_jobs_on_sharded_catalog_can_use_process_pool(catalog, monkeypatch):
+    if mp.get_start_method() != "fork":
+        pytest.skip("os.cpu_count yang di-patch hanya terwarisi lewat fork")
+    services.save_books([
+        {"id": i, "judul": f"Buku {i}", "penulis": f"P{i % 7}", "penerbit": f"X{i % 3}", "tahun": 2000 + i % 20,
+         "status": "borrowed" if i % 2 else "available", "dipinjam": i % 9} for i in range(1, 301)
+    ])
+    services.shard_split(by="range", size=50)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)  # >1 shard basi + >1 core → ProcessPoolExecutor
+    q = catalog
+    q.submit("ringkasan"); q.submit("top_penulis", 3)
+    assert q.wait(timeout=60)
+    assert [(r["status"], r["output"]) for r in q.rows() if r["status"] != "selesai"] == []
+    assert not q._proc.daemon
+
+
+def test_unknown_export_kind_rejected(catalog):
+    with pytest.raises(ValueError):
+        catalog.submit("tidak_ada")
+
+
+def test_export_without_files_is_failed_with_reason(catalog, monkeypatch):
+    monkeypatch.setattr(analytics_np, "HAS_NUMPY", False)
+    tasks, events = queue.Queue(), queue.Queue()
+    tasks.put((1, "statistik", ("tahun",), jobs._config()))
+    tasks.put(None)
+    jobs._worker(tasks, events)  # jalankan loop worker di proses ini
+    assert events.get_nowait()[1] == "berjalan"
+    _, status, _, info = events.get_nowait()
+    assert status == "gagal" and "numpy" in info["error"]
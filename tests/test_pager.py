@@ -0,0 +1,42 @@
+"""
+Test paged view: renderer fixed-width, potongan halaman, dan navigasi interaktif.
+Tidak membaca data/books.json (data dibuat di dalam test).
+"""
+
+import builtins
+import io
+
+from library_manager import pager
+
+
+def _books(n):
+    return [{"id": i, "judul": f"Judul {i:04d}", "penulis": "A", "tahun": 2000 + i % 20,
+             "status": "available"} for i in range(1, n + 1)]
+
+
+def test_stream_table_consumes_generator_and_truncates():
+    out = io.StringIO()
+    rows = ({"id": 1, "judul": "X" * 100} for _ in range(3))
+    n = pager.stream_table(rows, out=out)
+    lines = out.getvalue().splitlines()
+    assert n == 3 and len(lines) == 5  # header + garis + 3 baris
+    assert "…" in lines[2]
+    assert len({len(l) for l in lines}) == 1, "semua baris harus selebar kolom tetap"
+
+
+def test_page_slice_and_sort():
+    books = _books(45)
+    assert pager.page_count(45, 20) == 3
+    assert [b["id"] for b in pager.page_slice(books, 3, 20)] == [41, 42, 43, 44, 45]
+    assert pager.page_slice(books, 99, 20) == pager.page_slice(books, 3, 20)
+    desc = pager.sort_rows(books + [{"id": 99}], "tahun", desc=True)
+    assert desc[0]["tahun"] == 2019 and desc[-1]["id"] == 99  # None di akhir
+
+
+def test_browse_navigation(monkeypatch, capsys):
+    answers = iter(["n", "g", "3", "s", "1", "y", "0"])
+    monkeypatch.setattr(builtins, "input", lambda *a, **k: next(answers))
+    pager.browse(_books(45), "Uji", page_size=20)
+    out = capsys.readouterr().out
+    assert "halaman 2/3" in out and "halaman 3/3" in out
+    assert "urut id desc" in out and "Judul 0045" in out
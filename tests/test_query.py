@@ -0,0 +1,52 @@
+"""
+Test query gabungan: hasil planner berbasis index harus sama dengan scan brute-force,
+dan planner memulai dari predikat paling selektif.
+"""
+
+import itertools
+import json
+from pathlib import Path
+
+from library_manager import query
+
+BOOKS = json.loads((Path(__file__).resolve().parents[1] / "data" / "books.json").read_text(encoding="utf-8"))
+
+
+def _brute(books, penulis=None, status=None, tahun_min=None, tahun_max=None, keyword=None):
+    out = []
+    for b in books:
+        if penulis and b["penulis"].lower() != penulis.lower(): continue
+        if status and b["status"].lower() != status.lower(): continue
+        if tahun_min is not None and b["tahun"] < tahun_min: continue
+        if tahun_max is not None and b["tahun"] > tahun_max: continue
+        if keyword and not any(keyword.lower() in str(b[f]).lower() for f in ("judul", "penulis", "penerbit")):
+            continue
+        out.append(b)
+    return out
+
+
+def test_index_query_matches_brute_force():
+    index = query.CatalogIndex(BOOKS)
+    authors = [None, "tere liye", "Dan Brown", "Tidak Ada"]
+    statuses = [None, "available", "BORROWED"]
+    ranges = [(None, None), (2000, None), (None, 1999), (2005, 2015)]
+    keywords = [None, "an", "harry potter", "a b", "zzz"]
+    for penulis, status, (lo, hi), kw in itertools.product(authors, statuses, ranges, keywords):
+        crit = dict(penulis=penulis, status=status, tahun_min=lo, tahun_max=hi, keyword=kw)
+        assert query.run_query(index, **crit) == _brute(BOOKS, **crit), crit
+
+
+def test_sort_limit_and_plan_order():
+    index = query.CatalogIndex(BOOKS)
+    rows = query.run_query(index, status="available", sort="dipinjam", desc=True, limit=3)
+    assert len(rows) == 3
+    assert [r["dipinjam"] for r in rows] == sorted((b["dipinjam"] for b in BOOKS if b["status"] == "available"),
+                                                   reverse=True)[:3]
+    steps = query.plan(index, status="available", penulis="Tere Liye")
+    assert steps[0].startswith("index penulis=Tere Liye")
+
+
+def test_index_cached_per_version():
+    a = query.index_for(BOOKS, ("v", 1))
+    assert query.index_for([], ("v", 1)) is a
+    assert query.index_for([], ("v", 2)) is not a
@@ -0,0 +1,163 @@
+"""
+Test mode scan barcode: aturan status sama dengan menu, satu baris output per scan,
+dan group commit (tidak menulis ulang katalog per item).
+"""
+
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from library_manager import changes, scan, services
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(services, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(services, "DATA_FILE", str(tmp_path / "books.json"))
+    monkeypatch.setattr(services, "SHARD_DIR", str(tmp_path / "shards"))
+    monkeypatch.setattr(services, "CHANGES_FILE", str(tmp_path / "changes.jsonl"))
+    services.save_books([
+        {"id": i, "judul": f"Buku {i}", "dipinjam": 0, "status": "available",
+         "tanggal_pinjam": None, "tanggal_kembali": None} for i in range(1, 6)
+    ])
+    saves = []
+    real_save = services.save_books
+    monkeypatch.setattr(services, "save_books", lambda books: (saves.append(1), real_save(books)))
+    return saves
+
+
+def test_scan_stream_group_commits(catalog):
+    out = io.StringIO()
+    session = scan.ScanSession("borrow", batch=2, interval_ms=60_000, out=out)
+    stats = scan.run_scan_stream(["1\n", "2\n", "2\n", "abc\n", "99\n", "3\n"], session)
+
+    assert stats == {"scan": 6, "ok": 3, "gagal": 3, "commit": 2}
+    assert len(catalog) == 2  # batch 2 → commit setelah scan ke-2, lalu sisa saat selesai
+    lines = [l for l in out.getvalue().splitlines() if not l.startswith("[commit]")]
+    assert len(lines) == 6 and lines[2].startswith("✗ 2")
+
+    books = {b["id"]: b for b in services.load_books()}
+    assert [books[i]["status"] for i in (1, 2, 3, 4)] == ["borrowed"] * 3 + ["available"]
+    assert books[1]["dipinjam"] == 1 and books[1]["tanggal_kembali"]
+
+
+def test_return_mode_keeps_concurrent_changes(catalog):
+    session = scan.ScanSession("borrow", batch=100, out=io.StringIO())
+    session.scan("1")
+    # meja lain menambah buku sebelum commit
+    services.save_books(services.load_books() + [{"id": 9, "judul": "Baru", "status": "available"}])
+    session.close()
+    ret = scan.ScanSession("return", batch=100, out=io.StringIO())
+    assert ret.scan("1") and not ret.scan("2")
+    ret.close()
+    books = {b["id"]: b for b in services.load_books()}
+    assert 9 in books and books[1]["status"] == "available" and books[1]["tanggal_pinjam"] is None
+
+
+def test_commit_rechecks_latest_and_reports_conflicts(catalog):
+    out = io.StringIO()
+    session = scan.ScanSession("borrow", batch=100, out=out)
+    # meja lain meminjam buku 1 setelah sesi dibuka
+    other = services.find_book_by_id(1)
+    services.mark_borrowed(other)
+    services.commit_books([other])
+    assert session.scan("1") and session.scan("2")  # ✓ sementara (data sesi masih lama)
+    stats = session.close()
+
+    assert stats["ok"] == 1 and stats["gagal"] == 1
+    assert any(l.startswith("✗ 1: konflik") for l in out.getvalue().splitlines())
+    books = {b["id"]: b for b in services.load_books()}
+    assert books[1]["dipinjam"] == 1 and books[2]["status"] == "borrowed"
+    assert not session.scan("1")  # data sesi sudah diperbarui
+
+
+def test_idle_scanner_still_commits_on_interval(catalog):
+    seen = []
+
+    def lines():
+        yield "1\n"
+        time.sleep(0.3)  # scanner diam lebih lama dari interval
+        seen.append(len(catalog))
+        yield "2\n"
+
+    session = scan.ScanSession("borrow", batch=100, interval_ms=50, out=io.StringIO())
+    scan.run_scan_stream(lines(), session)
+    assert seen == [1]  # buku 1 sudah disimpan sebelum scan berikutnya datang
+
+
+def test_interrupt_commits_pending_scans(catalog, monkeypatch):
+    session = scan.ScanSession("borrow", batch=100, interval_ms=60_000, out=io.StringIO())
+    real_scan = session.scan
+
+    def scan_or_interrupt(raw):
+        if raw.strip() == "2":
+            raise KeyboardInterrupt
+        return real_scan(raw)
+
+    monkeypatch.setattr(session, "scan", scan_or_interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        scan.run_scan_stream(["1\n", "2\n", "3\n"], session)
+    assert services.find_book_by_id(1)["status"] == "borrowed"
+
+
+def test_prompt_stops_at_zero_without_consuming_more_input(catalog):
+    stream, out = io.StringIO("1\n0\n3\n"), io.StringIO()
+    session = scan.ScanSession("borrow", batch=100, out=out)
+    stats = scan.run_scan_prompt(session, stream=stream)
+    assert stats["ok"] == 1 and services.find_book_by_id(1)["status"] == "borrowed"
+    assert stream.readline() == "3\n"  # baris setelah '0' tetap milik menu
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="butuh pseudo-terminal (POSIX)")
+def test_prompt_commits_while_idle_between_reads(catalog):
+    master, slave = os.openpty()
+    seen = []
+
+    def typist():
+        os.write(master, b"1\n")
+        time.sleep(0.3)  # diam lebih lama dari interval
+        seen.append(len(catalog))
+        os.write(master, b"0\n")
+
+    out = io.StringIO()
+    session = scan.ScanSession("borrow", batch=100, interval_ms=50, out=out)
+    t = threading.Thread(target=typist)
+    with open(slave, "r", encoding="utf-8") as tty:
+        t.start()
+        scan.run_scan_prompt(session, stream=tty)
+    t.join(); os.close(master)
+    assert seen == [1]
+    # baris [commit] dicetak setelah baris berikutnya masuk, tidak menyela prompt "scan> "
+    assert out.getvalue().endswith("scan> [commit] 1 buku disimpan.\n")
+
+
+def test_menu_borrow_rechecks_latest_status(catalog, monkeypatch, capsys):
+    monkeypatch.setattr(services, "ask_int", lambda *a, **k: 1)
+
+    def other_desk_borrows_first(*a, **k):
+        services.apply_books([1], lambda b: services.borrow_error(b) or services.mark_borrowed(b), op="borrow")
+        return True
+
+    monkeypatch.setattr(services, "ask_yes_no", other_desk_borrows_first)
+    services.borrow_book()
+    assert "Gagal pinjam" in capsys.readouterr().out
+    assert services.find_book_by_id(1)["dipinjam"] == 1
+    assert [ev["op"] for ev in changes.read_since(services.CHANGES_FILE)] == ["borrow"]
+
+
+def test_prompt_prints_held_commit_on_eof(catalog, monkeypatch):
+    reads = iter(["1", None, EOFError])
+
+    def fake_readline(self, timeout=None):
+        r = next(reads)
+        if r is EOFError:
+            raise EOFError
+        return r
+
+    monkeypatch.setattr(scan.LineReader, "readline", fake_readline)
+    out = io.StringIO()
+    scan.run_scan_prompt(scan.ScanSession("borrow", batch=100, interval_ms=60_000, out=out), stream=io.StringIO())
+    assert out.getvalue().endswith("[commit] 1 buku disimpan.\n")  # commit saat menunggu tidak hilang